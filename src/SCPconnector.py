@@ -50,8 +50,9 @@ class scpConnector(object):
         """ Init the connector obj. Example: 
                 scpClient = scpConnector(('gateway.ncl.sg', '<username>', '<password>'), showProgress=True)
             Args:
-                destInfo (tuple): The destation host's ssh login information. 
-                    example: (sshHost(ip/domain), userName, password) 
+                destInfo (tuple or sshConnector): The destation host's ssh login information. 
+                    example: (sshHost(ip/domain), userName, password) or an inited 
+                    sshConnector (such as sshTopology.getConnector(<target>)).
                 jumpChain (list, optional): The jump host chain ssh info:
                     scpConnectorHost ---> jumphost1 ---> jumphost2---> ... ---> destinationHost
                     [jumphost1Infor, jumphost2Info]. 
@@ -62,16 +63,26 @@ class scpConnector(object):
                     progress. Defaults to False, better to set True when transfer big file.
         """
         self.destHost = None
-        if len(destInfo) != 3:
+        self.ownTunnel = True   # flag to identify whether close the ssh tunnel in close().
+        if isinstance(destInfo, sshConnector):
+            # use an existing connector (such as from SSHtopology), the tunnel 
+            # need to be inited by its owner.
+            if not destInfo.lock:
+                print("Error: the destination connector's tunnel is not inited.")
+                return None
+            self.destHost = destInfo
+            self.ownTunnel = False
+        elif len(destInfo) != 3:
             print("The destination information is invalid: %s" %str(destInfo))
             return None
-        sshHost, userName, password = destInfo
-        if jumpChain is None or len(jumpChain) == 0:
+        elif jumpChain is None or len(jumpChain) == 0:
+            sshHost, userName, password = destInfo
             self.destHost = sshConnector(None, sshHost, userName, password)
             self.destHost.addCmd(TNL_TEST_CMD, None)
             self.destHost.InitTunnel()
             self.destHost.runCmd(interval=0.1)
         else:
+            sshHost, userName, password = destInfo
             jumpHostHead = jumpHostTail = None
             for jumpInfo in jumpChain:
                 if jumpInfo is None or len(jumpInfo) != 3: continue
@@ -137,7 +148,7 @@ class scpConnector(object):
     def close(self):
         """ close the scpClient and the sshTunnel."""
         self.scpClient.close()
-        self.destHost.close()
+        if self.ownTunnel: self.destHost.close()
 
 #-----------------------------------------------------------------------------
 #-----------------------------------------------------------------------------
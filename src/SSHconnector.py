@@ -52,17 +52,60 @@
 
     Detail usage example refer to testcase file <sshConnectorTest.py>
 
+    Big output capture:
+    Set a capturePolicy (SSHreplyCapture.py) for a command by addCmd(cmdline, 
+    handleFun, capture=policy) or for all the commands in the connector by
+    setCapturePolicy(), the reply['reply'] passed to the handler will be a lazy
+    file-backed cmdReply object instead of a string. The cmdReply will be closed
+    after all the handlers returned, copy the data if it need to be kept.
+
+    Async reply handling:
+    Set a replyDispatcher (SSHreplyDispatcher.py) by setReplyDispatcher(), the reply
+    handlers will be called in the dispatcher's worker threads (keep the sequence of
+    each host) and call flush() to wait for all the pending replies handled.
+
+    Tracing:
+    Set a sshTracer (SSHtracer.py) by setTracer(), the InitTunnel() will record the
+    timing span of each phase (tcp connect/channel open, key exchange, auth) on each
+    node and runCmd() will record a span for each cmd.
+
+    Performance profile:
+    Set the profile name (SSHprofiles.py: 'throughput', 'low-latency-handshake',
+    'compressed-WAN') in the constructor or by setProfile() to set the preferred 
+    ciphers, MACs, KEX and compression of the connector's transport.
+
+    Result cache:
+    Set a cmdResultCache (SSHresultCache.py) by setResultCache() and add the read-only
+    cmds with addCmd(cmdline, handleFun, cacheTTL=sec), the repeated cmds in the TTL
+    will get the cached reply (reply['cached'] is True) without running on the host.
+
+    Batched sudo:
+    Call setSudoBatch() and the continuous sudo cmds in the queue will be run in one
+    elevated session, each reply has the clean output and the cmd's 'exitCode'. Only
+    the simple 'sudo <cmd>' (no shell list, pipe, redirect or expansion) is batched,
+    the other cmds run as normal.
 """
 
+import os
+import re
 import time
+import shlex
+import socket
 import paramiko
+from SSHreplyCapture import captureStream
+from SSHtracer import NULL_SPAN
+from SSHprofiles import getProfile, applyProfile
 CH_KIND = 'direct-tcpip' # open channel type/kind for jump hosts, we use direct TCP.
+SUDO_PREFIX = re.compile(r'^\s*sudo\s+(?=[^\s-])') # plain 'sudo ' prefix removed in the root shell.
+# shell syntax evaluated by the user's shell around the sudo (list/pipe, redirect, 
+# expansion), the cmd with these chars can not be moved into the root shell.
+SUDO_SHELL_CHARS = frozenset(';&|<>()$`\\\n*?[~')
 
 #-----------------------------------------------------------------------------
 #-----------------------------------------------------------------------------
 class sshConnector(object):
 
-    def __init__(self, parent, host, username, password, port=22) -> None:
+    def __init__(self, parent, host, username, password, port=22, profile=None) -> None:
         """ Init the ssh connector obj. example: mainHost = sshConnector(None, host, username, password)
             Args:
                 parent (sshConnector or paramiko.SSHClient): parent ssh client.
@@ -70,7 +113,13 @@ class sshConnector(object):
                 username (str): username.
                 password (str): user password.
                 port (int, optional): ssh port. Defaults to 22.
+                profile (str or dict, optional): transport performance profile name
+                    in SSHprofiles.PROFILE_CFG. Defaults to None (paramiko default).
+            Raises:
+                ValueError: the profile name is not valid.
         """
+        if profile is not None and getProfile(profile) is None:
+            raise ValueError("invalid ssh transport profile: %s" % str(profile))
         # init public parameters.
         self.parent = parent        # object parent. 
         self.host = host
@@ -78,12 +127,19 @@ class sshConnector(object):
         self.password = password
         self.sudoPassword = None
         self.port = port
+        self.profile = profile      # cipher/kex/compression profile of the transport.
         self.client = None
         
         self.childConnectors = []   # children connectors.
         self.connected = False
         self.cmdlines = []          # commands need to run under the current host.
         self.replyHandler = None    # own reply handler.
+        self.capturePolicy = None   # default output capture policy of the cmds.
+        self.replyDispatcher = None # worker pool to call the reply handlers.
+        self.tracer = None          # timing tracer, None means tracing disabled.
+        self.resultCache = None     # result cache of the idempotent cmds.
+        self.sudoBatch = False      # run the sudo cmds in one elevated session.
+        self.traceSpan = NULL_SPAN  # span of the tunnel init, parent of the children spans.
         self.lock = False           # lock the new added in
 
 #-----------------------------------------------------------------------------
@@ -98,10 +154,16 @@ class sshConnector(object):
             print("Error: can not add new child host: children host adding locked!")
             return False
         self.childConnectors.append(childConnector)
+        if self.replyDispatcher and childConnector.replyDispatcher is None:
+            childConnector.setReplyDispatcher(self.replyDispatcher)
+        if self.tracer and childConnector.tracer is None:
+            childConnector.setTracer(self.tracer)
+        if self.resultCache and childConnector.resultCache is None:
+            childConnector.setResultCache(self.resultCache)
         return True
 
 #-----------------------------------------------------------------------------
-    def addCmd(self, cmdline, handleFun=None):
+    def addCmd(self, cmdline, handleFun=None, capture=None, cacheTTL=None):
         """ Add the a cmd need to be executed in the current connector. (remove
             all the cmds in the command list if the input is 'None')
             Args:
@@ -111,11 +173,18 @@ class sshConnector(object):
                         reply = {   'host': self.host,
                                     'cmd':  cmdline,
                                     'reply':stdout.read().decode()}
+                capture (capturePolicy, optional): output capture policy of the cmd, 
+                        the 'reply' will be a cmdReply object if the policy is set.
+                        Defaults to None (use the connector's capturePolicy).
+                cacheTTL (float, optional): time to live (sec) of the cmd's cached reply
+                        if the connector has a result cache. Defaults to None (use
+                        the cache's defaultTTL).
         """
         if cmdline is None: 
             self.cmdlines = []
         else:
-            self.cmdlines.append((cmdline, handleFun))
+            self.cmdlines.append({'cmd': cmdline, 'handleFun': handleFun, 
+                                  'capture': capture, 'ttl': cacheTTL})
 
     def clearCmdList(self):
         self.cmdlines = []
@@ -128,6 +197,92 @@ class sshConnector(object):
         """
         self.sudoPassword = sudoPassword
 
+#-----------------------------------------------------------------------------
+    def setCapturePolicy(self, policy):
+        """ Set the default output capture policy for all the cmds in the current 
+            connector, set to None to read the whole output as a string.
+            Args:
+                policy (capturePolicy): SSHreplyCapture.capturePolicy object.
+        """
+        self.capturePolicy = policy
+
+#-----------------------------------------------------------------------------
+    def setSudoBatch(self, enable=True):
+        """ Enable/disable the batched sudo mode: the continuous simple sudo cmds 
+            (refer to _isSudoBatchCmd()) in the cmd queue will be run in one elevated 
+            session (sudo authenticate once) and each reply dict will have the cmd's
+            'exitCode'.
+            Args:
+                enable (bool, optional): Defaults to True.
+        """
+        self.sudoBatch = enable
+
+#-----------------------------------------------------------------------------
+    def setProfile(self, profile, recursive=False):
+        """ Set the transport performance profile (need to be called before the 
+            InitTunnel()), set to None to use paramiko default negotiation.
+            Args:
+                profile (str or dict): profile name in SSHprofiles.PROFILE_CFG.
+                recursive (bool, optional): set the profile for all the children 
+                    connectors. Defaults to False.
+        """
+        if profile is not None and getProfile(profile) is None: return False
+        self.profile = profile
+        if recursive:
+            for childConnector in self.childConnectors:
+                childConnector.setProfile(profile, recursive=recursive)
+        return True
+
+#-----------------------------------------------------------------------------
+    def setReplyDispatcher(self, dispatcher, recursive=True):
+        """ Set the reply dispatcher to call the reply handlers asynchronously, set 
+            to None to call the handlers inline in runCmd().
+            Args:
+                dispatcher (replyDispatcher): SSHreplyDispatcher.replyDispatcher object.
+                recursive (bool, optional): set the dispatcher for all the children 
+                    connectors. Defaults to True.
+        """
+        self.replyDispatcher = dispatcher
+        if recursive:
+            for childConnector in self.childConnectors:
+                childConnector.setReplyDispatcher(dispatcher, recursive=recursive)
+
+#-----------------------------------------------------------------------------
+    def setTracer(self, tracer, recursive=True):
+        """ Set the timing tracer, set to None to disable tracing.
+            Args:
+                tracer (sshTracer): SSHtracer.sshTracer object.
+                recursive (bool, optional): set the tracer for all the children 
+                    connectors. Defaults to True.
+        """
+        self.tracer = tracer
+        if recursive:
+            for childConnector in self.childConnectors:
+                childConnector.setTracer(tracer, recursive=recursive)
+
+    def _startSpan(self, name, parent, **attrs):
+        """ Start a trace span, return the no-op span if tracing is disabled."""
+        if self.tracer is None: return NULL_SPAN
+        return self.tracer.startSpan(name, parent, **attrs)
+
+#-----------------------------------------------------------------------------
+    def setResultCache(self, cache, recursive=True):
+        """ Set the result cache of the idempotent cmds, set to None to disable.
+            Args:
+                cache (cmdResultCache): SSHresultCache.cmdResultCache object.
+                recursive (bool, optional): set the cache for all the children 
+                    connectors. Defaults to True.
+        """
+        self.resultCache = cache
+        if recursive:
+            for childConnector in self.childConnectors:
+                childConnector.setResultCache(cache, recursive=recursive)
+
+#-----------------------------------------------------------------------------
+    def flush(self):
+        """ Wait until all the pending replies in the reply dispatcher are handled."""
+        if self.replyDispatcher: self.replyDispatcher.flush()
+
 #-----------------------------------------------------------------------------
     def clearChildren(self):
         """ Remove all the children connectors."""
@@ -150,33 +305,123 @@ class sshConnector(object):
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         result = True
-        if self.parent and self.parent.client:  # the parent's client need to be init.
-            # create a transport socket channel if the connector is mid jumphost.
-            transport = self.parent.client.get_transport()
-            srcAddr = (self.parent.host, self.parent.port)
-            destAddr = (self.host, self.port)
-            # create the channel from parent to current host.
-            channel = transport.open_channel(CH_KIND, destAddr, srcAddr)
-            try:
-                self.client.connect(self.host, username=self.username,
-                                    password=self.password, port=self.port, sock=channel)
-            except Exception as err:
-                print("SSH connection error > InitTunnel(): %s" % str(err))
-                result = False
-        else:
-            try:
-                self.client.connect(self.host, username=self.username,
-                                    password=self.password, port=self.port)
-            except Exception as err:
-                print("SSH connection error > InitTunnel(): %s" % str(err))
-                result = False
-        # Init all the children.
+        parentSpan = getattr(self.parent, 'traceSpan', None) if self.parent else None
+        self.traceSpan = self._startSpan('ssh.tunnel', parentSpan, host=self.host, 
+                                         port=self.port, user=self.username)
+        try:
+            if self.parent and self.parent.client:  # the parent's client need to be init.
+                # create a transport socket channel if the connector is mid jumphost.
+                transport = self.parent.client.get_transport()
+                if transport is None or not transport.is_active():
+                    raise paramiko.SSHException("parent host %s is not connected" % str(self.parent.host))
+                srcAddr = (self.parent.host, self.parent.port)
+                destAddr = (self.host, self.port)
+                # create the channel from parent to current host.
+                with self._startSpan('ssh.channel_open', self.traceSpan, kind=CH_KIND):
+                    channel = transport.open_channel(CH_KIND, destAddr, srcAddr)
+                self._connect(sock=channel)
+            else:
+                self._connect()
+        except Exception as err:
+            print("SSH connection error > InitTunnel(): %s" % str(err))
+            self.traceSpan.setError(err)
+            result = False
+        self.traceSpan.end()
+        # Init all the children (the children of a failed host will fail without
+        # breaking the other branches).
         for childconnector in self.childConnectors:
             rst = childconnector.InitTunnel()
             result &= rst
         self.connected = result
         return result
 
+#-----------------------------------------------------------------------------
+    def _connect(self, sock=None):
+        """ Connect and login the host (through the sock channel if it is not None). 
+            If tracing or profile is enabled, the tcp connect, key exchange and 
+            authentication are done step by step so each phase gets its own span
+            and the profile can be applied before the key exchange.
+        """
+        if self.tracer is None and self.profile is None:
+            self.client.connect(self.host, username=self.username,
+                                password=self.password, port=self.port, sock=sock)
+            return
+        if sock is None:
+            with self._startSpan('tcp.connect', self.traceSpan):
+                sock = socket.create_connection((self.host, self.port))
+        transport = paramiko.Transport(sock)
+        if self.profile is not None and not applyProfile(transport, self.profile):
+            # not fall back to the default negotiation the profile wants to avoid.
+            sock.close()
+            raise paramiko.SSHException("profile %s can not be applied" % str(self.profile))
+        self._attachTransport(transport)
+        with self._startSpan('ssh.kex', self.traceSpan) as span:
+            transport.start_client()
+            span.setAttr('cipher', transport.remote_cipher)
+            span.setAttr('mac', transport.remote_mac)
+            span.setAttr('compression', transport.remote_compression)
+        serverKey = transport.get_remote_server_key()
+        keyName = self.host if self.port == 22 else "[%s]:%d" % (self.host, self.port)
+        self.client.get_host_keys().add(keyName, serverKey.get_name(), serverKey)
+        with self._startSpan('ssh.auth', self.traceSpan) as span:
+            span.setAttr('method', self._auth(transport))
+
+    def _attachTransport(self, transport):
+        """ Use the manually built transport as the SSHClient's transport. The 
+            SSHClient has no public setter, its get_transport(), exec_command() 
+            and close() all use the _transport attribute.
+        """
+        self.client._transport = transport
+
+#-----------------------------------------------------------------------------
+    def _auth(self, transport):
+        """ Authenticate the transport in the same order as the SSHClient.connect()
+            default (allow_agent=True, look_for_keys=True): the ssh agent keys, the
+            ~/.ssh/id_* key files, then the password.
+            Returns:
+                str: the auth method used ('publickey' or 'password').
+        """
+        savedErr = None
+        twoFactor = False
+        agent = paramiko.Agent()
+        try:
+            for key in self._getAuthKeys(agent):
+                try:
+                    allowedTypes = set(transport.auth_publickey(self.username, key))
+                except (paramiko.SSHException, IOError) as err:
+                    savedErr = err
+                    continue
+                # a key accepted with the 2nd factor needs the password auth.
+                twoFactor = bool(allowedTypes & {'keyboard-interactive', 'password'})
+                if not twoFactor: return 'publickey'
+                break
+        finally:
+            agent.close()
+        if self.password is not None:
+            transport.auth_password(self.username, self.password)
+            return 'password'
+        if twoFactor:
+            transport.auth_interactive_dumb(self.username)
+            return 'keyboard-interactive'
+        raise savedErr or paramiko.AuthenticationException("no authentication methods available")
+
+    def _getAuthKeys(self, agent):
+        """ Yield the ssh agent keys then the ~/.ssh (and ~/ssh) id_* key files."""
+        for key in agent.get_keys():
+            yield key
+        for keyClass, name in ((paramiko.RSAKey, 'rsa'), (paramiko.DSSKey, 'dsa'),
+                               (paramiko.ECDSAKey, 'ecdsa'), (paramiko.Ed25519Key, 'ed25519')):
+            for directory in ('.ssh', 'ssh'):
+                filePath = os.path.expanduser('~/%s/id_%s' % (directory, name))
+                if not os.path.isfile(filePath): continue
+                try:
+                    key = keyClass.from_private_key_file(filePath, password=self.password)
+                except (paramiko.SSHException, IOError):
+                    continue
+                if os.path.isfile(filePath + '-cert.pub'):
+                    key.load_certificate(filePath + '-cert.pub')
+                yield key
+
 #-----------------------------------------------------------------------------
     def runCmd(self, interval=0.1):
         """ Run the cmd in the command queue one by one, sleep time interval 
@@ -188,29 +433,174 @@ class sshConnector(object):
         if not self.lock:
             print("Error > runCmd(): can not run cmd, please init the tunnel first!")
             return None
-        for cmdset in self.cmdlines:
-            cmdline, handleFun = cmdset
-            print("Run cmd in host: %s" % str(self.host))
-            # Request a pseudo-terminal for the sudo to input the admin password.
-            pty = 'sudo' in cmdline
-            stdin, stdout, stderr = self.client.exec_command(cmdline, get_pty=pty)  # edited#
-            # Input the sudo password, TODO: will add the function updateSudoPasswd() later.
-            if pty:
-                sudoPasswordStr = self.password if self.sudoPassword is None else self.sudoPassword
-                stdin.write('%s\n' % sudoPasswordStr)
-                stdin.flush()
-            if interval:
-                time.sleep(interval)
-            # Handle the cmd reply.
-            cmdRst = stdout.read().decode()
-            if not cmdRst: cmdRst = stderr.read().decode()
-            rplDict = {'host': self.host, 'cmd':  cmdline, 'reply':cmdRst} if self.replyHandler or handleFun else None
-            if handleFun: handleFun(rplDict)
-            if self.replyHandler: self.replyHandler(rplDict)
+        if not self.isActive():
+            # the children's tunnels go through the current host, skip them too.
+            print("Error > runCmd(): host %s is not connected, skip its cmds and children." % str(self.host))
+            return None
+        idx = 0
+        while idx < len(self.cmdlines):
+            if self.sudoBatch and self._isSudoBatchCmd(self.cmdlines[idx]['cmd']):
+                # run the continuous sudo cmds in one elevated session.
+                batch = []
+                while idx < len(self.cmdlines) and self._isSudoBatchCmd(self.cmdlines[idx]['cmd']):
+                    batch.append(self.cmdlines[idx])
+                    idx += 1
+                self._runSudoBatch(batch)
+            else:
+                self._runOneCmd(self.cmdlines[idx], interval)
+                idx += 1
 
         for childconnector in self.childConnectors:
             childconnector.runCmd(interval=interval)
 
+#-----------------------------------------------------------------------------
+    def execCmd(self, cmdline, cacheTTL=None):
+        """ Run one cmd immediately (not added in the cmd queue) and return the 
+            reply dict, the connector's replyHandler, result cache and sudo batch
+            mode also work for the cmd. (The cmd will not use the capture policy)
+            Args:
+                cmdline (string): command line string.
+                cacheTTL (float, optional): cached reply time to live. Defaults to None.
+            Returns:
+                dict: reply dict, None if the tunnel is not inited.
+        """
+        if not self.lock:
+            print("Error > execCmd(): can not run cmd, please init the tunnel first!")
+            return None
+        cmdset = {'cmd': cmdline, 'handleFun': None, 'capture': None, 'ttl': cacheTTL}
+        if self.sudoBatch and self._isSudoBatchCmd(cmdline):
+            return self._runSudoBatch([cmdset])[0]
+        return self._runOneCmd(cmdset, 0, defaultCapture=False)
+
+#-----------------------------------------------------------------------------
+    def _runOneCmd(self, cmdset, interval, defaultCapture=True):
+        """ Run one cmd (or get its cached reply) and handle the reply."""
+        cmdline, handleFun = cmdset['cmd'], cmdset['handleFun']
+        print("Run cmd in host: %s" % str(self.host))
+        policy = cmdset['capture'] or (self.capturePolicy if defaultCapture else None)
+        rplDict = {'host': self.host, 'cmd': cmdline}
+        cacheTTL, cacheKey = self._getCacheTTL(cmdset, policy), None
+        if cacheTTL:
+            cacheKey = self.resultCache.makeKey(self.getHopPath(), cmdline)
+            cmdRst = self.resultCache.get(cacheKey)
+            rplDict['cached'] = cmdRst is not None
+        if not rplDict.get('cached'):
+            with self._startSpan('ssh.cmd', self.traceSpan, host=self.host, cmd=cmdline) as span:
+                cmdRst, channel = self._execCmd(cmdline, interval, policy)
+                span.setAttr('replyBytes', cmdRst.size if policy else len(cmdRst))
+            # only cache the successful result (the failed cmd's reply is the stderr).
+            if cacheKey and channel.recv_exit_status() == 0:
+                self.resultCache.put(cacheKey, cmdRst, cacheTTL)
+        rplDict['reply'] = cmdRst
+        # Handle the cmd reply.
+        handlers = [func for func in (handleFun, self.replyHandler) if func]
+        releaseFun = cmdRst.close if policy else None
+        self._handleReply(handlers, rplDict, releaseFun)
+        return rplDict
+
+#-----------------------------------------------------------------------------
+    def _runSudoBatch(self, batch):
+        """ Run a batch of sudo cmds in one elevated session and handle the replies."""
+        print("Run %d sudo cmds in host: %s" % (len(batch), str(self.host)))
+        with self._startSpan('ssh.sudo_batch', self.traceSpan, host=self.host, cmdNum=len(batch)):
+            results = self._execSudoBatch([cmdset['cmd'] for cmdset in batch])
+        rplDicts = []
+        for cmdset, (cmdRst, exitCode) in zip(batch, results):
+            handlers = [func for func in (cmdset['handleFun'], self.replyHandler) if func]
+            rplDict = {'host': self.host, 'cmd': cmdset['cmd'], 'reply': cmdRst, 'exitCode': exitCode}
+            self._handleReply(handlers, rplDict)
+            rplDicts.append(rplDict)
+        return rplDicts
+
+    @staticmethod
+    def _isSudoBatchCmd(cmdline):
+        """ Return True if the whole cmd is one plain 'sudo <cmd>' which gives the 
+            same result when run in the root shell without the 'sudo ' prefix.
+        """
+        match = SUDO_PREFIX.match(cmdline)
+        return bool(match) and not SUDO_SHELL_CHARS.intersection(cmdline[match.end():])
+
+    def _execSudoBatch(self, cmdlines):
+        """ Elevate once by 'sudo -S' (password from stdin, no pty so no echo) and 
+            run all the cmds in one root shell, each cmd's output and exit code is
+            wrapped by the random begin/end markers.
+            Returns:
+                list: (reply string, exit code) of each cmd, the exit code is None 
+                    if the cmd was not run (such as sudo authentication failed).
+        """
+        marker = '__SSHC_%s' % os.urandom(8).hex()
+        scriptLines = []
+        for idx, cmdline in enumerate(cmdlines):
+            cmdline = SUDO_PREFIX.sub('', cmdline, count=1) # already root in the shell.
+            scriptLines.append("echo '%s_B%d'" % (marker, idx))
+            scriptLines.append("( %s\n) </dev/null 2>&1" % cmdline)
+            scriptLines.append("rc=$?; printf '\\n%s_E%d_%%d\\n' $rc" % (marker, idx))
+        script = '\n'.join(scriptLines)
+        stdin, stdout, stderr = self.client.exec_command("sudo -S -p '' sh -c %s" % shlex.quote(script))
+        sudoPasswordStr = self.password if self.sudoPassword is None else self.sudoPassword
+        stdin.write('%s\n' % sudoPasswordStr)
+        stdin.flush()
+        stdin.channel.shutdown_write()
+        output = stdout.read().decode(errors='replace')
+        errStr = stderr.read().decode(errors='replace')
+        pattern = re.compile(r'%s_B(\d+)\n(.*?)\n%s_E\1_(\d+)\n' % (marker, marker), re.S)
+        results = {int(match.group(1)): (match.group(2), int(match.group(3))) 
+                   for match in pattern.finditer(output)}
+        return [results.get(idx, (errStr, None)) for idx in range(len(cmdlines))]
+
+#-----------------------------------------------------------------------------
+    def _getCacheTTL(self, cmdset, policy):
+        """ Return the cache TTL of the cmd, None if the cmd should not be cached."""
+        if self.resultCache is None or policy is not None or 'sudo' in cmdset['cmd']:
+            return None
+        return cmdset['ttl'] if cmdset['ttl'] is not None else self.resultCache.defaultTTL
+
+#-----------------------------------------------------------------------------
+    def _execCmd(self, cmdline, interval, policy=None):
+        """ Execute one cmd and return the reply string (or the cmdReply object 
+            if the capture policy is set) and the cmd's channel (to get the exit status).
+        """
+        # Request a pseudo-terminal for the sudo to input the admin password.
+        pty = 'sudo' in cmdline
+        stdin, stdout, stderr = self.client.exec_command(cmdline, get_pty=pty)  # edited#
+        # Input the sudo password, TODO: will add the function updateSudoPasswd() later.
+        if pty:
+            sudoPasswordStr = self.password if self.sudoPassword is None else self.sudoPassword
+            stdin.write('%s\n' % sudoPasswordStr)
+            stdin.flush()
+        if interval:
+            time.sleep(interval)
+        if policy is None:
+            cmdRst = stdout.read().decode()
+            if not cmdRst: cmdRst = stderr.read().decode()
+            return cmdRst, stdout.channel
+        # Stream the output into the bounded buffer instead of one big string.
+        cmdRst = captureStream(stdout, policy)
+        if cmdRst.size == 0:
+            cmdRst.close()
+            cmdRst = captureStream(stderr, policy)
+        return cmdRst, stdout.channel
+
+#-----------------------------------------------------------------------------
+    def _handleReply(self, handlers, rplDict, releaseFun=None):
+        """ Pass the reply dict to the handlers inline or by the reply dispatcher."""
+        if handlers and self.replyDispatcher:
+            key = "%s:%s" % (self.host, self.port)
+            if self.replyDispatcher.submit(key, handlers, rplDict, releaseFun): return
+        try:
+            for handleFun in handlers: handleFun(rplDict)
+        finally:
+            if releaseFun: releaseFun()
+
+#-----------------------------------------------------------------------------
+    def getHopPath(self):
+        """ Return the (host, port, username) of each hop from the root connector
+            to the current host, the same address behind different jumphosts can
+            be different hosts.
+        """
+        parentPath = self.parent.getHopPath() if hasattr(self.parent, 'getHopPath') else ()
+        return parentPath + ((self.host, self.port, self.username),)
+
 #-----------------------------------------------------------------------------
     def getTransport(self):
         if not self.lock:
@@ -219,6 +609,13 @@ class sshConnector(object):
         else:
             return self.client.get_transport()
 
+    def isActive(self):
+        """ Return True if the connector's ssh transport is connected and logged in
+            now (the transport keeps active after the authentication failed).
+        """
+        transport = self.client.get_transport() if self.client else None
+        return transport is not None and transport.is_active() and transport.is_authenticated()
+
 #-----------------------------------------------------------------------------
     def setAllreplyHandler(self, func):
         """ set the replay handler for all the cmd's reply.
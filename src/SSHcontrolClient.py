@@ -0,0 +1,228 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHcontrolClient.py
+#
+# Purpose:     This module is the client lib and cli of the SSHcontrolDaemon, it
+#              sends the requests (run cmd, scp, forward) to the daemon through
+#              the Unix socket so the established ssh tunnels can be reused.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/28
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    The client only uses the python standard libs (no paramiko import), so a
+    short-lived cli call only costs the unix socket round trip plus the remote
+    cmd execution time.
+
+    Usage example (lib):
+        client = controlClient()
+        rplDict = client.runCmd('web1', 'uname -a')
+        client.upload('web1', 'local.txt', '~/remote.txt')
+        port = client.addForward('web1', 8080, '172.18.178.11', 80)
+
+    Usage example (cli):
+        python SSHcontrolClient.py run web1 uname -a
+        python SSHcontrolClient.py upload web1 local.txt ~/remote.txt
+        python SSHcontrolClient.py download web1 ~/remote.txt ./
+        python SSHcontrolClient.py forward web1 8080 172.18.178.11 80
+        python SSHcontrolClient.py socks web1 1080 [remote|local|none]
+        python SSHcontrolClient.py unforward web1 8080
+        python SSHcontrolClient.py list
+        python SSHcontrolClient.py stop
+"""
+
+import os
+import sys
+import json
+import stat
+import socket
+import struct
+
+#-----------------------------------------------------------------------------
+def getDefaultSockDir():
+    """ Return the per-user private dir of the control socket: $XDG_RUNTIME_DIR/
+        sshConnector if the runtime dir exists, else ~/.sshConnector.
+    """
+    runtimeDir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtimeDir and os.path.isdir(runtimeDir):
+        return os.path.join(runtimeDir, 'sshConnector')
+    return os.path.join(os.path.expanduser('~'), '.sshConnector')
+
+# default unix socket path (one daemon for each user).
+DEF_SOCK_PATH = os.environ.get('SSHC_CONTROL_SOCK', os.path.join(getDefaultSockDir(), 'control.sock'))
+
+#-----------------------------------------------------------------------------
+def checkSockDir(sockPath, create=False):
+    """ Check the dir of the socket is only accessible by the current user (owned
+        by the user and mode 0700), so other local users can not bind or replace 
+        the socket.
+        Args:
+            sockPath (str): unix socket path.
+            create (bool, optional): create the dir with mode 0700 if not exist. 
+                Defaults to False.
+        Returns:
+            bool: True if the dir is private.
+    """
+    sockDir = os.path.dirname(os.path.abspath(sockPath))
+    try:
+        if create and not os.path.exists(sockDir): os.makedirs(sockDir, mode=0o700)
+        dirStat = os.lstat(sockDir)
+    except OSError as err:
+        print("Error > checkSockDir() socket dir %s not accessible: %s" % (sockDir, str(err)))
+        return False
+    if not stat.S_ISDIR(dirStat.st_mode) or dirStat.st_uid != os.getuid() or dirStat.st_mode & 0o077:
+        print("Error > checkSockDir() socket dir %s must be owned by the current user with mode 0700." % sockDir)
+        return False
+    return True
+
+def getPeerUid(sock):
+    """ Return the uid of the unix socket peer, None if the OS has no SO_PEERCRED."""
+    if not hasattr(socket, 'SO_PEERCRED'): return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class controlClient(object):
+
+    def __init__(self, sockPath=DEF_SOCK_PATH, timeout=None) -> None:
+        """ Init the client obj. Example: client = controlClient()
+            Args:
+                sockPath (str, optional): daemon unix socket path. Defaults to DEF_SOCK_PATH.
+                timeout (float, optional): socket timeout (sec). Defaults to None.
+        """
+        self.sockPath = sockPath
+        self.timeout = timeout
+        self.sock = None
+        self.rfile = None
+
+#-----------------------------------------------------------------------------
+    def connect(self):
+        """ Connect to the daemon (the connection is kept for the next requests)."""
+        if self.sock: return True
+        if not checkSockDir(self.sockPath): return False
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        try:
+            self.sock.connect(self.sockPath)
+            # make sure the daemon is run by the current user before sending anything.
+            peerUid = getPeerUid(self.sock)
+            if peerUid is None: peerUid = os.stat(self.sockPath).st_uid
+            if peerUid != os.getuid():
+                raise PermissionError("socket is owned by uid %d" % peerUid)
+        except OSError as err:
+            print("Error > connect() can not connect to the daemon %s: %s" % (self.sockPath, str(err)))
+            self.sock.close()
+            self.sock = None
+            return False
+        self.rfile = self.sock.makefile('rb')
+        return True
+
+#-----------------------------------------------------------------------------
+    def request(self, action, **params):
+        """ Send a request to the daemon.
+            Args:
+                action (str): request action name.
+                params: action parameters.
+            Returns:
+                dict: response dict {'result': bool, 'data'/'error': ...}.
+        """
+        if not self.connect():
+            return {'result': False, 'error': 'daemon not connected'}
+        params['action'] = action
+        try:
+            self.sock.sendall((json.dumps(params) + '\n').encode())
+            line = self.rfile.readline()
+        except OSError as err:
+            self.close()
+            return {'result': False, 'error': str(err)}
+        if not line:
+            self.close()
+            return {'result': False, 'error': 'connection closed by the daemon'}
+        return json.loads(line)
+
+    def _requestData(self, action, **params):
+        response = self.request(action, **params)
+        if not response['result']:
+            print("Error > %s: %s" % (action, response['error']))
+            return None
+        return response['data']
+
+#-----------------------------------------------------------------------------
+    def runCmd(self, target, cmdline, cacheTTL=None):
+        """ Run a cmd on the target and return the reply dict."""
+        return self._requestData('run', target=target, cmd=cmdline, cacheTTL=cacheTTL)
+
+    def upload(self, target, srcPath, destPath):
+        """ Upload a local file to the target (the path is sent as absolute path)."""
+        return self._requestData('upload', target=target, src=os.path.abspath(srcPath), dest=destPath)
+
+    def download(self, target, srcPath, localPath=''):
+        """ Download a target file to the local path (default current folder)."""
+        return self._requestData('download', target=target, src=srcPath,
+                                 localPath=os.path.abspath(localPath or os.getcwd()))
+
+    def addForward(self, target, localPort, remoteHost, remotePort):
+        """ Forward localPort to remoteHost:remotePort through the target, return
+            the bound local port.
+        """
+        data = self._requestData('forward', target=target, localPort=localPort,
+                                 remoteHost=remoteHost, remotePort=remotePort)
+        return data['localPort'] if data else None
+
+    def addSocks(self, target, localPort, resolver='remote'):
+        """ Start a SOCKS5 port with the target as the exit host, return the bound
+            local port. The resolver can be 'remote', 'local' or 'none' (no dns cache).
+        """
+        data = self._requestData('socks', target=target, localPort=localPort, resolver=resolver)
+        return data['localPort'] if data else None
+
+    def removeForward(self, target, localPort):
+        return self._requestData('unforward', target=target, localPort=localPort) is not None
+
+    def getJsonInfo(self):
+        return self._requestData('list')
+
+    def shutdown(self):
+        return self._requestData('shutdown') is not None
+
+#-----------------------------------------------------------------------------
+    def close(self):
+        if self.rfile: self.rfile.close()
+        if self.sock: self.sock.close()
+        self.sock = self.rfile = None
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+def main():
+    args = sys.argv[1:]
+    client = controlClient()
+    if len(args) >= 3 and args[0] == 'run':
+        rplDict = client.runCmd(args[1], ' '.join(args[2:]))
+        if rplDict: sys.stdout.write(rplDict['reply'])
+    elif len(args) == 4 and args[0] == 'upload':
+        print(client.upload(args[1], args[2], args[3]))
+    elif len(args) in (3, 4) and args[0] == 'download':
+        print(client.download(args[1], args[2], args[3] if len(args) == 4 else ''))
+    elif len(args) == 5 and args[0] == 'forward':
+        print("Local port: %s" % str(client.addForward(args[1], int(args[2]), args[3], int(args[4]))))
+    elif len(args) in (3, 4) and args[0] == 'socks':
+        resolver = args[3] if len(args) == 4 else 'remote'
+        print("Local port: %s" % str(client.addSocks(args[1], int(args[2]), resolver=resolver)))
+    elif len(args) == 3 and args[0] == 'unforward':
+        print(client.removeForward(args[1], int(args[2])))
+    elif len(args) == 1 and args[0] == 'list':
+        print(json.dumps(client.getJsonInfo(), indent=2))
+    elif len(args) == 1 and args[0] == 'stop':
+        print(client.shutdown())
+    else:
+        print(__doc__)
+    client.close()
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHcontrolDaemon.py
+#
+# Purpose:     This module is used to create a long-lived local control daemon
+#              (similar to the OpenSSH ControlMaster) which owns the established
+#              ssh connector tree and provides a Unix socket API, so the short
+#              lived programs can run cmds, scp files and forward ports through
+#              the already authenticated jumphost chains.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/28
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    Each run of the SSHconnector/SCPconnector main() or a script using these
+    modules rebuilds the whole jumphost chain, which needs several seconds of
+    handshakes through every hop. The daemon loads a topology file (SSHtopology.py),
+    inits all the tunnels once and serves the requests from the clients:
+
+    client (SSHcontrolClient.py) --+
+    client -------------------------+--> unix socket --> controlDaemon --> connector tree
+    client -------------------------+                                       (authenticated)
+
+    Protocol: one json object per line for each request and response.
+        request : {"action": "run", "target": "web1", "cmd": "uname -a"}
+        response: {"result": true, "data": {...}} or {"result": false, "error": "..."}
+
+    A target whose tunnel init failed or broke later is reconnected when a request
+    uses it (only the dead hops on its path are rebuilt).
+
+    Actions:
+        ping, list, run(target, cmd, cacheTTL), upload(target, src, dest),
+        download(target, src, localPath), forward(target, localPort, remoteHost,
+        remotePort), socks(target, localPort, resolver), unforward(target, localPort),
+        shutdown.
+
+    Usage:
+        python SSHcontrolDaemon.py <topology.json> [socket path]
+        Then use SSHcontrolClient.py (client lib and cli) to send the requests.
+"""
+
+import os
+import sys
+import json
+import stat
+import socket
+import threading
+import socketserver as SocketServer
+
+from SSHtopology import loadTopology
+from SCPconnector import scpConnector
+from SSHforwarder import multiForwarder
+from SSHcontrolClient import DEF_SOCK_PATH, checkSockDir, getPeerUid
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class ControlServer(SocketServer.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def verify_request(self, request, client_address):
+        # only serve the clients run by the same user.
+        peerUid = getPeerUid(request)
+        return peerUid is None or peerUid == os.getuid()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class ControlHandler(SocketServer.StreamRequestHandler):
+
+    def handle(self):
+        # one connection can send multiple requests (one json per line).
+        for line in self.rfile:
+            if not line.strip(): continue
+            try:
+                request = json.loads(line)
+                data = self.server.owner.handleRequest(request)
+                response = {'result': True, 'data': data}
+            except Exception as err:
+                response = {'result': False, 'error': str(err)}
+            try:
+                self.wfile.write((json.dumps(response) + '\n').encode())
+                self.wfile.flush()
+            except OSError:
+                break
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class controlDaemon(object):
+
+    def __init__(self, topology, sockPath=DEF_SOCK_PATH) -> None:
+        """ Init the daemon obj. Example:
+                daemon = controlDaemon(loadTopology('topology.json'))
+            Args:
+                topology (sshTopology): SSHtopology.sshTopology object.
+                sockPath (str, optional): unix socket path. Defaults to DEF_SOCK_PATH.
+        """
+        self.topology = topology
+        self.sockPath = sockPath
+        self.server = None
+        self.forwarders = {}    # target name -> multiForwarder.
+        self._lock = threading.Lock()
+        self._connLock = threading.Lock()   # serialize the tunnel reconnection.
+        self.actions = {
+            'ping': self._ping,
+            'list': self._list,
+            'run': self._run,
+            'upload': self._upload,
+            'download': self._download,
+            'forward': self._forward,
+            'socks': self._socks,
+            'unforward': self._unforward,
+            'shutdown': self._shutdown
+        }
+
+#-----------------------------------------------------------------------------
+    def start(self):
+        """ Init all the ssh tunnels and serve the requests until shutdown."""
+        if not checkSockDir(self.sockPath, create=True): return False
+        if os.path.exists(self.sockPath):
+            # remove the stale socket file left by a crashed daemon.
+            testSock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                testSock.connect(self.sockPath)
+                print("Error: another daemon is running on %s" % self.sockPath)
+                return False
+            except OSError:
+                try:
+                    os.unlink(self.sockPath)
+                except OSError as err:
+                    print("Error: can not remove the stale socket %s: %s" % (self.sockPath, str(err)))
+                    return False
+            finally:
+                testSock.close()
+        print("Init all the ssh tunnels in the topology ...")
+        if not self.topology.initTunnel():
+            print("Warning: ssh tunnels init failed of targets: %s (will retry when used)" 
+                  % str(self.topology.getFailedTargets()))
+        oldMask = os.umask(0o177)    # only the owner can access the socket.
+        try:
+            self.server = ControlServer(self.sockPath, ControlHandler)
+        finally:
+            os.umask(oldMask)
+        self.server.owner = self
+        print("Control daemon ready on %s" % self.sockPath)
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+        return True
+
+#-----------------------------------------------------------------------------
+    def stop(self):
+        """ Close all the forwarders, ssh sessions and the unix socket."""
+        with self._lock:
+            forwarders, self.forwarders = list(self.forwarders.values()), {}
+        for forwarder in forwarders:
+            forwarder.stopForward(closeChain=False)
+        self.topology.close()
+        if self.server:
+            self.server.server_close()
+            self.server = None
+        if os.path.exists(self.sockPath) and stat.S_ISSOCK(os.stat(self.sockPath).st_mode):
+            os.unlink(self.sockPath)
+        print("Control daemon stopped.")
+
+#-----------------------------------------------------------------------------
+    def handleRequest(self, request):
+        """ Run the request's action and return the response data, raise the
+            exception if the request failed.
+        """
+        action = self.actions.get(request.get('action'))
+        if action is None:
+            raise ValueError("unknown action: %s" % str(request.get('action')))
+        return action(request)
+
+    def _getConnector(self, request):
+        connector = self.topology.getConnector(request.get('target'))
+        if connector is None:
+            raise ValueError("unknown target: %s" % str(request.get('target')))
+        if not connector.isActive():
+            # the tunnel init failed or the connection is broken, reconnect it.
+            with self._connLock:
+                if not connector.isActive() and not self.topology.reconnect(request['target']):
+                    raise ConnectionError("target %s tunnel is not connected" % str(request.get('target')))
+        return connector
+
+#-----------------------------------------------------------------------------
+    def _ping(self, request):
+        return {'pid': os.getpid()}
+
+    def _list(self, request):
+        info = self.topology.getJsonInfo()
+        info['disconnected targets'] = self.topology.getFailedTargets()
+        with self._lock:
+            info['forwards'] = {name: forwarder.getJsonInfo() for name, forwarder in self.forwarders.items()}
+        return info
+
+    def _run(self, request):
+        rplDict = self._getConnector(request).execCmd(request['cmd'], cacheTTL=request.get('cacheTTL'))
+        rplDict['reply'] = str(rplDict['reply'])
+        return rplDict
+
+    def _upload(self, request):
+        scpClient = scpConnector(self._getConnector(request))
+        try:
+            scpClient.scpClient.put(request['src'], request['dest'])
+        finally:
+            scpClient.close()
+        return {'src': request['src'], 'dest': request['dest']}
+
+    def _download(self, request):
+        scpClient = scpConnector(self._getConnector(request))
+        try:
+            scpClient.scpClient.get(request['src'], local_path=request.get('localPath', ''))
+        finally:
+            scpClient.close()
+        return {'src': request['src'], 'localPath': request.get('localPath', '')}
+
+#-----------------------------------------------------------------------------
+    def _getForwarder(self, request):
+        """ Return the target's forwarder (create and start it if not exist)."""
+        connector = self._getConnector(request)
+        with self._lock:
+            forwarder = self.forwarders.get(request['target'])
+            if forwarder and forwarder.transport is not connector.getTransport():
+                # the tunnel was reconnected, the old forwarder's rules are lost.
+                forwarder.stopForward(closeChain=False)
+                forwarder = None
+            if forwarder is None:
+                forwarder = multiForwarder(connector=connector, bindAddr=request.get('bindAddr', '127.0.0.1'))
+                forwarder.startForward(block=False)
+                self.forwarders[request['target']] = forwarder
+        return forwarder
+
+    def _forward(self, request):
+        localPort = self._getForwarder(request).addRule(
+            int(request.get('localPort', 0)), request['remoteHost'], int(request['remotePort']))
+        if localPort is None: raise OSError("add forward rule failed")
+        return {'localPort': localPort}
+
+    def _socks(self, request):
+        # resolver: 'remote' (default), 'local' or 'none' (no dns cache).
+        resolver = request.get('resolver') or 'remote'
+        localPort = self._getForwarder(request).addSocksRule(
+            int(request.get('localPort', 0)), resolver=None if resolver == 'none' else resolver)
+        if localPort is None: raise OSError("add socks rule failed")
+        return {'localPort': localPort}
+
+    def _unforward(self, request):
+        with self._lock:
+            forwarder = self.forwarders.get(request.get('target'))
+        if forwarder is None or not forwarder.removeRule(int(request['localPort'])):
+            raise ValueError("no forward rule on local port %s" % str(request.get('localPort')))
+        return {'localPort': int(request['localPort'])}
+
+    def _shutdown(self, request):
+        # serve_forever() need to be stopped from another thread.
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+        return {'pid': os.getpid()}
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python SSHcontrolDaemon.py <topology.json> [socket path]")
+        return None
+    sockPath = sys.argv[2] if len(sys.argv) > 2 else DEF_SOCK_PATH
+    daemon = controlDaemon(loadTopology(sys.argv[1]), sockPath=sockPath)
+    daemon.start()
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    main()
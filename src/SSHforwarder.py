@@ -45,14 +45,166 @@
     to the target remote host one by one.
     3. Call forward function to start.
 
+    Multiple forward rules:
+    Use multiForwarder to forward many local ports through one shared jumphost
+    chain, all the rules are served by one non-blocking accept loop and can be 
+    added/removed by addRule()/removeRule() while forwarding. addSocksRule() adds
+    a dynamic (SOCKS5, same as ssh -D) forward port, the destination of each 
+    connection is decided by the SOCKS request.
+
+    Reverse forward:
+    Use remoteForwarder to let the last host of the chain listen on the remote
+    ports and forward the incoming connections back to the local host ports.
+
 Returns:
     _type_: _description_
 """
 
+import time
+import shlex
+import socket
+import struct
 import select
+import selectors
+import threading
 import socketserver as SocketServer
 from SSHconnector import sshConnector, CH_KIND
 
+BUF_SZ = 32768  # data pump buffer size (same as the paramiko channel max packet).
+DNS_TTL = 300   # default dns cache time to live (unit second).
+DNS_NEG_TTL = 30    # time to live of the failed dns resolve result (unit second).
+SOCKS_TIMEOUT = 10  # SOCKS handshake timeout (unit second).
+
+# SOCKS5 protocol constants (RFC 1928).
+SOCKS_VER = 5
+SOCKS_CMD_CONNECT = 1
+SOCKS_ATYP_IPV4 = 1
+SOCKS_ATYP_DOMAIN = 3
+SOCKS_ATYP_IPV6 = 4
+SOCKS_REP_OK = 0
+SOCKS_REP_FAIL = 1
+SOCKS_REP_HOST_UNREACH = 4
+SOCKS_REP_CMD_UNSUPPORTED = 7
+SOCKS_REP_ATYP_UNSUPPORTED = 8
+
+#-----------------------------------------------------------------------------
+def pumpData(sock, channel, bufSize=BUF_SZ):
+    """ Pump the data between the local socket and the ssh channel until one 
+        side is closed. 
+        Returns:
+            tuple: (bytes sent to the channel, bytes sent to the socket)
+    """
+    bytesOut = bytesIn = 0
+    try:
+        while True:
+            r, w, x = select.select([sock, channel], [], [])
+            if sock in r:
+                data = sock.recv(bufSize)
+                if len(data) == 0: break
+                channel.sendall(data)
+                bytesOut += len(data)
+            if channel in r:
+                data = channel.recv(bufSize)
+                if len(data) == 0: break
+                sock.sendall(data)
+                bytesIn += len(data)
+    except (OSError, EOFError) as err:
+        print("Warning > pumpData() tunnel broken: %s" % str(err))
+    return bytesOut, bytesIn
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class forwardMetrics(object):
+    """ Thread safe connection and traffic counters of a forward rule."""
+    def __init__(self) -> None:
+        self.totalConns = 0
+        self.activeConns = 0
+        self.failedConns = 0
+        self.bytesOut = 0   # local -> remote
+        self.bytesIn = 0    # remote -> local
+        self._lock = threading.Lock()
+
+    def connOpen(self):
+        with self._lock:
+            self.totalConns += 1
+            self.activeConns += 1
+
+    def connClose(self, bytesOut, bytesIn):
+        with self._lock:
+            self.activeConns -= 1
+            self.bytesOut += bytesOut
+            self.bytesIn += bytesIn
+
+    def connFail(self):
+        with self._lock:
+            self.failedConns += 1
+
+    def getJsonInfo(self):
+        with self._lock:
+            return {
+                'total connections': self.totalConns,
+                'active connections': self.activeConns,
+                'failed connections': self.failedConns,
+                'bytes out': self.bytesOut,
+                'bytes in': self.bytesIn
+            }
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class dnsCache(object):
+    """ Thread safe host name resolve result cache with a time to live."""
+    def __init__(self, resolveFun, ttl=DNS_TTL, negativeTTL=DNS_NEG_TTL, maxSize=1024) -> None:
+        """ Init the cache.
+            Args:
+                resolveFun (function): function(hostname) return the ip address 
+                    string, or None if can not resolve.
+                ttl (int, optional): cache time to live (sec). Defaults to DNS_TTL.
+                negativeTTL (int, optional): time to live (sec) of the failed resolve
+                    result, so the name can not be resolved is not resolved again
+                    for each connection. Defaults to DNS_NEG_TTL.
+                maxSize (int, optional): max cached names. Defaults to 1024.
+        """
+        self.resolveFun = resolveFun
+        self.ttl = ttl
+        self.negativeTTL = negativeTTL
+        self.maxSize = maxSize
+        self.hits = self.misses = 0
+        self._cache = {}    # hostname -> (ip address, expire time)
+        self._lock = threading.Lock()
+
+    def resolve(self, hostname):
+        """ Return the cached ip address of the host name or resolve it."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(hostname)
+            if cached and cached[1] > now:
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+        ipAddr = self.resolveFun(hostname) or None
+        ttl = self.ttl if ipAddr else self.negativeTTL
+        if ttl > 0:
+            with self._lock:
+                if hostname not in self._cache and len(self._cache) >= self.maxSize:
+                    # drop the entry which will expire first.
+                    self._cache.pop(min(self._cache, key=lambda name: self._cache[name][1]))
+                self._cache[hostname] = (ipAddr, now + ttl)
+        return ipAddr
+
+    def clear(self):
+        with self._lock:
+            self._cache = {}
+
+#-----------------------------------------------------------------------------
+def recvExact(sock, size):
+    """ Receive exactly size bytes from the socket, raise EOFError if closed."""
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk: raise EOFError("connection closed by peer")
+        data += chunk
+    return data
+
 #-----------------------------------------------------------------------------
 #-----------------------------------------------------------------------------
 class ForwardServer(SocketServer.ThreadingTCPServer):
@@ -82,18 +234,8 @@ class Handler(SocketServer.BaseRequestHandler):
         print("Connected!  Tunnel open %r -> %r -> %r"
             % ( self.request.getpeername(), channel.getpeername(), (self.chain_host, self.chain_port)))
         
-        while True:
-            r, w, x = select.select([self.request, channel], [], [])
-            if self.request in r:
-                data = self.request.recv(1024)
-                if len(data) == 0: break
-                channel.send(data)
-            if channel in r:
-                data = channel.recv(1024)
-                if len(data) == 0: break
-                self.request.send(data)
-
         peername = self.request.getpeername()
+        pumpData(self.request, channel)
         channel.close()
         self.request.close()
         print("Tunnel closed from %r" % (peername,))
@@ -182,6 +324,665 @@ class localForwarder(object):
             self.forwardServer = None
         print('Port forwarding stopped.')
 
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class chainForwarder(object):
+    """ Base class of the forwarders which share one jumphost chain transport."""
+    def __init__(self, connector=None) -> None:
+        """ Init the chain. 
+            Args:
+                connector (sshConnector, optional): use an existing connector (the
+                    last host of the chain) instead of building the chain by 
+                    addNextJH(). Defaults to None.
+        """
+        self.extConnector = connector
+        self.connectors = [] # sshConnectors list.
+
+#-----------------------------------------------------------------------------
+    def addNextJH(self, jumphost, username, password, port=22):
+        """ Add next one jump host in the jumphost queue.
+            Args:
+                jumphost (str): jumphost address.
+                username (str): jumphost ssh login user name.
+                password (str): jumphost ssh login password.
+                port (int, optional): ssh port. Defaults to 22.
+        """
+        if self.extConnector:
+            print("Error: can not add jumphost to the forwarder using an existing connector.")
+            return False
+        parent = None if len(self.connectors) == 0 else self.connectors[-1]
+        nextConnector = sshConnector(parent, jumphost, username, password, port=port)
+        if parent:parent.addChild(nextConnector)
+        self.connectors.append(nextConnector)
+        return True
+
+#-----------------------------------------------------------------------------
+    def initChain(self):
+        """ Init the jumphost tunnel chain (only once) and return the last host's
+            transport, return None if init failed.
+        """
+        if self.extConnector:
+            if not self.extConnector.lock: self.extConnector.InitTunnel()
+            return self.extConnector.getTransport()
+        if len(self.connectors) == 0:
+            print("Error: no jumphost server setup.")
+            return None
+        if not self.connectors[0].lock: self.connectors[0].InitTunnel()
+        transport = self.connectors[-1].getTransport()
+        if transport is None:
+            print("Error: connectors not provide any transport channel.")
+        return transport
+
+#-----------------------------------------------------------------------------
+    def closeChain(self):
+        """ Close the chain ssh sessions built by the forwarder (an existing 
+            connector passed in will not be closed).
+        """
+        if self.connectors: self.connectors[0].close()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class multiForwarder(chainForwarder):
+    """ Forward multiple local ports to different remote host ports through one
+        shared jumphost chain. All the listen ports are served by one non-blocking
+        accept loop and the rules can be added/removed while forwarding:
+
+        localPort1 --+                                          +--> remoteHost1:port1
+        localPort2 --+--> accept loop ==> one ssh chain ==> ----+--> remoteHost2:port2
+        localPort3 --+                                          +--> remoteHost3:port3
+
+        Usage example:
+            forwarder = multiForwarder()
+            forwarder.addNextJH('gateway.ncl.sg', '<username>', '<password>')
+            forwarder.addRule(8080, '172.18.178.10', 80)
+            forwarder.addRule(8443, '172.18.178.11', 443)
+            forwarder.addSocksRule(1080, resolver='remote')
+            forwarder.startForward(block=False)
+            ...
+            forwarder.removeRule(8443)
+            forwarder.stopForward()
+    """
+    def __init__(self, connector=None, bindAddr='', dnsTTL=DNS_TTL) -> None:
+        """ Init the forwarder.
+            Args:
+                connector (sshConnector, optional): existing last host connector. 
+                    Defaults to None.
+                bindAddr (str, optional): local bind address. Defaults to '' (all).
+                dnsTTL (int, optional): dns cache time to live of the SOCKS rules.
+                    Defaults to DNS_TTL.
+        """
+        super().__init__(connector=connector)
+        self.bindAddr = bindAddr
+        self.dnsTTL = dnsTTL
+        self.transport = None
+        self.rules = {}         # localPort -> rule dict.
+        self.running = False
+        self.selector = None
+        self.loopThread = None
+        self._loopDone = threading.Event()
+        self._loopDone.set()
+        self._lock = threading.Lock()
+        self._closingSocks = [] # listen socks of the removed rules to be closed.
+        self._activeConns = set()
+        self._syncCond = threading.Condition(self._lock) # notified after listen socks closed.
+        self._wakeR = self._wakeW = None # socket pair to wake up the accept loop.
+
+#-----------------------------------------------------------------------------
+    def addRule(self, localPort, remoteHost, remotePort):
+        """ Add a forward rule localPort -> remoteHost:remotePort (can be called 
+            before or during forwarding).
+            Args:
+                localPort (int): local port to bind (0 means a free port).
+                remoteHost (str): target remote host address.
+                remotePort (int): target remote host port.
+            Returns:
+                int: the bound local port, None if failed.
+        """
+        return self._addRule(localPort, {'type': 'forward', 'remoteHost': remoteHost, 
+                                         'remotePort': int(remotePort)})
+
+#-----------------------------------------------------------------------------
+    def addSocksRule(self, localPort, resolver='remote'):
+        """ Add a dynamic forward rule (same as ssh -D): run a SOCKS5 (no auth,
+            CONNECT) listener on the local port, each request opens a direct-tcpip
+            channel to the requested destination through the shared chain.
+            Args:
+                localPort (int): local port to bind (0 means a free port).
+                resolver (str or function, optional): how to resolve the domain 
+                    name in the request, the result is cached with the dnsTTL:
+                    'remote': resolve by 'getent hosts' on the last host, the name
+                        can not be resolved is passed to the last host's sshd.
+                    'local': resolve by the local host dns.
+                    function(hostname): customized resolve function.
+                    None: no cache, pass the name to the last host's sshd.
+                    Defaults to 'remote'. Each rule has its own dns cache.
+            Returns:
+                int: the bound local port, None if failed.
+        """
+        if resolver == 'local':
+            resolveFun = self._resolveLocal
+        elif resolver == 'remote':
+            resolveFun = self._resolveRemote
+        elif resolver is None or callable(resolver):
+            resolveFun = resolver
+        else:
+            print("Error > addSocksRule() invalid resolver: %s" % str(resolver))
+            return None
+        cache = dnsCache(resolveFun, ttl=self.dnsTTL) if resolveFun else None
+        return self._addRule(localPort, {'type': 'socks', 'remoteHost': '*', 
+                                         'remotePort': '*', 'dnsCache': cache,
+                                         'passUnresolved': resolver == 'remote'})
+
+    def _addRule(self, localPort, rule):
+        try:
+            listenSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listenSock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listenSock.bind((self.bindAddr, int(localPort)))
+            listenSock.listen(128)
+            listenSock.setblocking(False)
+        except OSError as err:
+            print("Error > addRule() can not bind local port %s: %s" % (str(localPort), str(err)))
+            return None
+        localPort = listenSock.getsockname()[1]
+        rule.update({'localPort': localPort, 'sock': listenSock, 'metrics': forwardMetrics()})
+        with self._lock:
+            if localPort in self.rules:
+                listenSock.close()
+                print("Error > addRule() local port %s already has a rule." % str(localPort))
+                return None
+            self.rules[localPort] = rule
+        self._wakeup()
+        return localPort
+
+#-----------------------------------------------------------------------------
+    def removeRule(self, localPort):
+        """ Remove a forward rule and stop listening its local port (the local port
+            is closed when the function returns), the opened connections of the rule
+            are not affected.
+            Returns:
+                bool: True if the rule is removed.
+        """
+        with self._lock:
+            rule = self.rules.pop(int(localPort), None)
+            if rule is None: return False
+            self._closingSocks.append(rule['sock'])
+        if not self.running or self.loopThread is threading.current_thread():
+            self._syncListeners()
+            return True
+        # the listen sock is registered in the accept loop's selector, wait the 
+        # loop to unregister and close it.
+        self._wakeup()
+        with self._syncCond:
+            self._syncCond.wait_for(lambda: rule['sock'].fileno() == -1 or not self.running)
+        return True
+
+#-----------------------------------------------------------------------------
+    def getJsonInfo(self):
+        """ Get current object's info under Json format"""
+        with self._lock:
+            rules = list(self.rules.values())
+        return {
+            'running': self.running,
+            'Connectors num': len(self.connectors),
+            'rules': [self._getRuleInfo(rule) for rule in rules]
+        }
+
+    def _getRuleInfo(self, rule):
+        info = {'type': rule['type'],
+                'local port': rule['localPort'], 
+                'remote host': rule['remoteHost'],
+                'remote port': rule['remotePort']}
+        info.update(rule['metrics'].getJsonInfo())
+        if rule.get('dnsCache'):
+            info['dns cache hits'] = rule['dnsCache'].hits
+            info['dns cache misses'] = rule['dnsCache'].misses
+        return info
+
+#-----------------------------------------------------------------------------
+    def startForward(self, block=True):
+        """ Init the chain and start the accept loop.
+            Args:
+                block (bool, optional): run the accept loop in the current thread
+                    until stopForward()/KeyboardInterrupt. Defaults to True, if False
+                    the loop runs in a background thread.
+            Returns:
+                bool: True if the forwarding is started.
+        """
+        if self.running: return True
+        self.transport = self.initChain()
+        if self.transport is None or not self.transport.is_active():
+            print("Error > startForward() the jumphost chain is not connected.")
+            return False
+        self.selector = selectors.DefaultSelector()
+        self._wakeR, self._wakeW = socket.socketpair()
+        self.selector.register(self._wakeR, selectors.EVENT_READ, None)
+        self.running = True
+        self._loopDone.clear()
+        print('Starting the forward server ...')
+        if not block:
+            self.loopThread = threading.Thread(target=self._acceptLoop, daemon=True)
+            self.loopThread.start()
+            return True
+        self.loopThread = threading.current_thread()
+        try:
+            self._acceptLoop()
+        except KeyboardInterrupt:
+            self.stopForward()
+        return True
+
+#-----------------------------------------------------------------------------
+    def _wakeup(self):
+        try:
+            if self._wakeW: self._wakeW.send(b'x')
+        except OSError:
+            pass
+
+    def _syncListeners(self):
+        """ Register the new rules' listen socks and close the removed ones."""
+        with self._lock:
+            closingSocks, self._closingSocks = self._closingSocks, []
+            rules = list(self.rules.values())
+        for listenSock in closingSocks:
+            try:
+                if self.selector: self.selector.unregister(listenSock)
+            except (KeyError, ValueError):
+                pass
+            listenSock.close()
+        if closingSocks:
+            with self._syncCond: self._syncCond.notify_all()
+        if not self.selector: return
+        for rule in rules:
+            try:
+                self.selector.get_key(rule['sock'])
+            except KeyError:
+                self.selector.register(rule['sock'], selectors.EVENT_READ, rule)
+
+    def _acceptLoop(self):
+        """ Single non-blocking accept loop of all the rules' local ports."""
+        try:
+            self._syncListeners()
+            while self.running:
+                for key, _ in self.selector.select(timeout=1):
+                    if key.data is None:
+                        self._wakeR.recv(1024)
+                        self._syncListeners()
+                        continue
+                    try:
+                        conn, addr = key.fileobj.accept()
+                    except (BlockingIOError, OSError):
+                        continue
+                    conn.setblocking(True)
+                    threading.Thread(target=self._serveConn, args=(conn, addr, key.data),
+                                     daemon=True).start()
+        finally:
+            self._loopDone.set()
+        print('Port forwarding stopped.')
+
+#-----------------------------------------------------------------------------
+    def _serveConn(self, conn, addr, rule):
+        """ Open the direct-tcpip channel for an accepted connection and pump data."""
+        metrics = rule['metrics']
+        if rule['type'] == 'socks':
+            # an idle client should not hold the thread forever in the handshake.
+            conn.settimeout(SOCKS_TIMEOUT)
+            destAddr = self._socksHandshake(conn, rule)
+            if destAddr is None:
+                metrics.connFail()
+                conn.close()
+                return
+            conn.settimeout(None)
+        else:
+            destAddr = (rule['remoteHost'], rule['remotePort'])
+        try:
+            channel = self.transport.open_channel(CH_KIND, destAddr, addr)
+        except Exception as err:
+            print("Error > _serveConn() Incoming request to %s:%d failed: %s" 
+                  % (destAddr[0], destAddr[1], str(err)))
+            channel = None
+        if rule['type'] == 'socks':
+            self._socksReply(conn, SOCKS_REP_OK if channel else SOCKS_REP_HOST_UNREACH)
+        if channel is None:
+            metrics.connFail()
+            conn.close()
+            return
+        metrics.connOpen()
+        connPair = (conn, channel)
+        with self._lock: self._activeConns.add(connPair)
+        bytesOut, bytesIn = pumpData(conn, channel)
+        with self._lock: self._activeConns.discard(connPair)
+        channel.close()
+        conn.close()
+        metrics.connClose(bytesOut, bytesIn)
+
+#-----------------------------------------------------------------------------
+    def _socksHandshake(self, conn, rule):
+        """ Do the SOCKS5 method negotiation and read the CONNECT request.
+            Returns:
+                tuple: (destHost, destPort), None if the request is invalid.
+        """
+        try:
+            ver, methodNum = recvExact(conn, 2)
+            methods = recvExact(conn, methodNum)
+            if ver != SOCKS_VER or 0 not in methods:
+                conn.sendall(bytes([SOCKS_VER, 0xFF])) # no acceptable methods.
+                return None
+            conn.sendall(bytes([SOCKS_VER, 0]))
+            ver, cmd, _, atyp = recvExact(conn, 4)
+            if atyp == SOCKS_ATYP_IPV4:
+                destHost = socket.inet_ntop(socket.AF_INET, recvExact(conn, 4))
+            elif atyp == SOCKS_ATYP_IPV6:
+                destHost = socket.inet_ntop(socket.AF_INET6, recvExact(conn, 16))
+            elif atyp == SOCKS_ATYP_DOMAIN:
+                destHost = recvExact(conn, recvExact(conn, 1)[0]).decode('idna')
+            else:
+                self._socksReply(conn, SOCKS_REP_ATYP_UNSUPPORTED)
+                return None
+            destPort = struct.unpack('!H', recvExact(conn, 2))[0]
+            if cmd != SOCKS_CMD_CONNECT:
+                self._socksReply(conn, SOCKS_REP_CMD_UNSUPPORTED)
+                return None
+        except (OSError, EOFError, UnicodeError) as err:
+            print("Error > _socksHandshake() invalid SOCKS request: %s" % str(err))
+            return None
+        if atyp == SOCKS_ATYP_DOMAIN and rule['dnsCache']:
+            ipAddr = rule['dnsCache'].resolve(destHost)
+            if ipAddr is None and rule['passUnresolved']:
+                return (destHost, destPort)
+            if ipAddr is None:
+                print("Warning > _socksHandshake() can not resolve %s" % destHost)
+                self._socksReply(conn, SOCKS_REP_HOST_UNREACH)
+                return None
+            destHost = ipAddr
+        return (destHost, destPort)
+
+    def _socksReply(self, conn, rep):
+        try:
+            conn.sendall(bytes([SOCKS_VER, rep, 0, SOCKS_ATYP_IPV4, 0, 0, 0, 0, 0, 0]))
+        except OSError:
+            pass
+
+#-----------------------------------------------------------------------------
+    def _resolveLocal(self, hostname):
+        try:
+            return socket.gethostbyname(hostname)
+        except OSError:
+            return None
+
+    def _resolveRemote(self, hostname):
+        """ Resolve the host name by 'getent hosts' on the last host of the chain."""
+        try:
+            channel = self.transport.open_session()
+            channel.exec_command('getent hosts %s' % shlex.quote(hostname))
+            result = b''
+            while True:
+                data = channel.recv(BUF_SZ)
+                if not data: break
+                result += data
+            channel.close()
+        except Exception as err:
+            print("Error > _resolveRemote() resolve %s failed: %s" % (hostname, str(err)))
+            return None
+        fields = result.decode(errors='replace').split()
+        return fields[0] if fields else None
+
+#-----------------------------------------------------------------------------
+    def stopForward(self, closeChain=True):
+        """ Stop the accept loop, close all the listen ports and the connections.
+            All the rules are removed, add the rules again before restarting.
+            Args:
+                closeChain (bool, optional): close the jumphost chain built by the
+                    forwarder. Defaults to True.
+        """
+        self.running = False
+        self._wakeup()
+        # wait the accept loop (background or blocking mode in another thread) exit
+        # before closing the selector it uses.
+        if self.loopThread is not threading.current_thread():
+            self._loopDone.wait()
+        self.loopThread = None
+        with self._lock:
+            listenSocks = [rule['sock'] for rule in self.rules.values()] + self._closingSocks
+            self.rules = {}
+            self._closingSocks = []
+            activeConns = list(self._activeConns)
+        for listenSock in listenSocks: listenSock.close()
+        with self._syncCond: self._syncCond.notify_all()
+        for conn, channel in activeConns:
+            channel.close()
+            conn.close()
+        if self.selector:
+            self.selector.close()
+            self.selector = None
+        if self._wakeR:
+            self._wakeR.close()
+            self._wakeW.close()
+            self._wakeR = self._wakeW = None
+        if closeChain: self.closeChain()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class remoteForwarder(chainForwarder):
+    """ Reverse (remote to local, same as ssh -R) forwarder: ask the last host of 
+        the jumphost chain to listen on the remote ports and forward each incoming
+        connection back through the chain to a local host port:
+
+        localHost:localPort <== chain ==> lastHost:remotePort <--- remote clients
+
+        Usage example:
+            forwarder = remoteForwarder()
+            forwarder.addNextJH('gateway.ncl.sg', '<username>', '<password>')
+            forwarder.addRule(9000, '127.0.0.1', 9000)
+            forwarder.startForward()
+    """
+    def __init__(self, connector=None, maxConns=256) -> None:
+        """ Init the forwarder.
+            Args:
+                connector (sshConnector, optional): existing last host connector. 
+                    Defaults to None.
+                maxConns (int, optional): max concurrent inbound connections, the 
+                    connections over the limit will be rejected. Defaults to 256.
+        """
+        super().__init__(connector=connector)
+        self.transport = None
+        self.rules = {}         # remotePort -> rule dict.
+        self.running = False
+        self.maxConns = maxConns
+        self._connSlots = threading.BoundedSemaphore(maxConns)
+        self._lock = threading.Lock()
+        self._activeConns = set()
+        self._stopEvent = threading.Event()
+
+#-----------------------------------------------------------------------------
+    def addRule(self, remotePort, localHost, localPort, bindAddr=''):
+        """ Add a reverse forward rule bindAddr:remotePort (on the last host) -> 
+            localHost:localPort (can be called before or during forwarding).
+            Args:
+                remotePort (int): port on the last host to listen (0 means a free
+                    port, only allowed while forwarding).
+                localHost (str): local (or local reachable) host address.
+                localPort (int): local host port.
+                bindAddr (str, optional): bind address on the last host. Defaults 
+                    to '' (all the interfaces, depend on the sshd GatewayPorts).
+            Returns:
+                int: the remote port, None if failed.
+        """
+        rule = {'bindAddr': bindAddr, 'remotePort': int(remotePort), 'localHost': localHost,
+                'localPort': int(localPort), 'metrics': forwardMetrics()}
+        if rule['remotePort'] == 0:
+            # the port is allocated by the last host, no client knows it before
+            # the request returns so the rule is added after the request.
+            if not self.running:
+                print("Error > addRule() remote port 0 is only allowed while forwarding.")
+                return None
+            if self._requestForward(rule) is None: return None
+            with self._lock: self.rules[rule['remotePort']] = rule
+            return rule['remotePort']
+        # add the rule before the request, so the connection comes just after 
+        # the forward request is accepted can find its rule.
+        with self._lock:
+            if rule['remotePort'] in self.rules:
+                print("Error > addRule() remote port %s already has a rule." % str(remotePort))
+                return None
+            self.rules[rule['remotePort']] = rule
+        if self.running and self._requestForward(rule) is None:
+            with self._lock: self.rules.pop(rule['remotePort'], None)
+            return None
+        return rule['remotePort']
+
+#-----------------------------------------------------------------------------
+    def removeRule(self, remotePort):
+        """ Cancel the remote listen port of the rule, the opened connections are 
+            not affected.
+            Returns:
+                bool: True if the rule is removed.
+        """
+        with self._lock:
+            rule = self.rules.pop(int(remotePort), None)
+        if rule is None: return False
+        if self.running: self._cancelForward(rule)
+        return True
+
+#-----------------------------------------------------------------------------
+    def _requestForward(self, rule):
+        """ Send the tcpip-forward request of the rule to the last host."""
+        try:
+            # paramiko keeps one handler for all the forward requests of a transport.
+            rule['remotePort'] = self.transport.request_port_forward(
+                rule['bindAddr'], rule['remotePort'], handler=self._onChannel)
+        except Exception as err:
+            print("Error > _requestForward() remote port %s forward request rejected: %s" 
+                  % (str(rule['remotePort']), str(err)))
+            return None
+        return rule['remotePort']
+
+    def _cancelForward(self, rule):
+        """ Send the cancel-tcpip-forward request of the rule to the last host."""
+        # not use transport.cancel_port_forward(), it also removes the transport's 
+        # only forward handler which the other rules are still using.
+        try:
+            if self.transport.is_active() and self.transport.global_request(
+                    'cancel-tcpip-forward', (rule['bindAddr'], rule['remotePort']), wait=True) is None:
+                print("Warning > _cancelForward() remote port %s cancel request rejected." 
+                      % str(rule['remotePort']))
+        except Exception as err:
+            print("Warning > _cancelForward() cancel port forward failed: %s" % str(err))
+
+#-----------------------------------------------------------------------------
+    def _onChannel(self, channel, originAddr, serverAddr):
+        """ Incoming forwarded-tcpip channel handler (called in the transport thread,
+            so the data pump is started in a new thread).
+        """
+        with self._lock:
+            rule = self.rules.get(serverAddr[1])
+        if rule is None:
+            print("Warning > _onChannel() no rule for remote port %s" % str(serverAddr[1]))
+            channel.close()
+            return
+        if not self._connSlots.acquire(blocking=False):
+            print("Warning > _onChannel() max connections %d reached." % self.maxConns)
+            rule['metrics'].connFail()
+            channel.close()
+            return
+        threading.Thread(target=self._serveConn, args=(channel, originAddr, rule),
+                         daemon=True).start()
+
+    def _serveConn(self, channel, originAddr, rule):
+        metrics = rule['metrics']
+        try:
+            try:
+                conn = socket.create_connection((rule['localHost'], rule['localPort']))
+            except OSError as err:
+                print("Error > _serveConn() connect to %s:%d failed: %s"
+                      % (rule['localHost'], rule['localPort'], str(err)))
+                metrics.connFail()
+                channel.close()
+                return
+            metrics.connOpen()
+            connPair = (conn, channel)
+            with self._lock: self._activeConns.add(connPair)
+            bytesOut, bytesIn = pumpData(conn, channel)
+            with self._lock: self._activeConns.discard(connPair)
+            channel.close()
+            conn.close()
+            metrics.connClose(bytesOut, bytesIn)
+        finally:
+            self._connSlots.release()
+
+#-----------------------------------------------------------------------------
+    def getJsonInfo(self):
+        """ Get current object's info under Json format"""
+        with self._lock:
+            rules = list(self.rules.values())
+        ruleInfos = []
+        for rule in rules:
+            info = {'bind address': rule['bindAddr'],
+                    'remote port': rule['remotePort'],
+                    'local host': rule['localHost'],
+                    'local port': rule['localPort']}
+            info.update(rule['metrics'].getJsonInfo())
+            ruleInfos.append(info)
+        return {
+            'running': self.running,
+            'Connectors num': len(self.connectors),
+            'max connections': self.maxConns,
+            'rules': ruleInfos
+        }
+
+#-----------------------------------------------------------------------------
+    def startForward(self, block=True):
+        """ Init the chain and send the forward requests of all the rules.
+            Args:
+                block (bool, optional): block the current thread until 
+                    stopForward()/KeyboardInterrupt. Defaults to True.
+            Returns:
+                bool: True if the forwarding is started.
+        """
+        if self.running: return True
+        self.transport = self.initChain()
+        if self.transport is None or not self.transport.is_active():
+            print("Error > startForward() the jumphost chain is not connected.")
+            return False
+        with self._lock:
+            rules = list(self.rules.values())
+        failedRules = [rule for rule in rules if self._requestForward(rule) is None]
+        if rules and len(failedRules) == len(rules):
+            # keep the configured rules so the forwarding can be started again.
+            print("Error > startForward() all the remote port forward requests failed.")
+            return False
+        # the rules rejected by the last host are removed, the others are served.
+        with self._lock:
+            for rule in failedRules: self.rules.pop(rule['remotePort'], None)
+        self.running = True
+        self._stopEvent.clear()
+        print('Starting the reverse forward ...')
+        if block:
+            try:
+                while not self._stopEvent.wait(1): pass
+            except KeyboardInterrupt:
+                self.stopForward()
+        return True
+
+#-----------------------------------------------------------------------------
+    def stopForward(self, closeChain=True):
+        """ Cancel all the remote ports and close the opened connections.
+            Args:
+                closeChain (bool, optional): close the jumphost chain built by the
+                    forwarder. Defaults to True.
+        """
+        if self.running:
+            with self._lock:
+                rules = list(self.rules.values())
+            for rule in rules: self._cancelForward(rule)
+        self.running = False
+        self._stopEvent.set()
+        with self._lock:
+            activeConns = list(self._activeConns)
+        for conn, channel in activeConns:
+            channel.close()
+            conn.close()
+        if closeChain: self.closeChain()
+        print('Reverse port forwarding stopped.')
+
 #-----------------------------------------------------------------------------
 #-----------------------------------------------------------------------------
 def main():
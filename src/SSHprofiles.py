@@ -0,0 +1,114 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHprofiles.py
+#
+# Purpose:     This module provides the named ssh transport performance profiles
+#              (preferred ciphers, MACs, key exchange, host key types, compression
+#              and channel window size) which can be applied on the transport
+#              created by each sshConnector.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/17
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    The paramiko transport uses the default algorithm negotiation, on the CPU
+    bound jump hosts the cipher choice has a big effect on the throughput and the
+    handshake time. We provide below profiles:
+
+    - throughput: AES-CTR (hardware AES-NI) with the encrypt-then-mac sha2 MAC and
+      a bigger channel window, for the big data transfer (scp, forwarding).
+    - low-latency-handshake: only allow the curve25519/ecdh key exchange and the
+      ed25519/ecdsa/rsa-sha2 host keys, the slow DH (group exchange) key exchange
+      and the legacy ssh-rsa/ssh-dss host keys can not be negotiated.
+    - compressed-WAN: zlib compression, for the text output through a slow link.
+
+    The algorithms in the profile are put in front of the paramiko's default list
+    (the algorithms not supported by the installed paramiko are ignored), so the
+    negotiation will not fail if the server doesn't support the preferred ones.
+    The option lists in the profile's 'exclusive' only keep the preferred ones, 
+    the connection fails if the server supports none of them.
+
+    Usage example:
+        connector = sshConnector(None, host, username, password, profile='throughput')
+        Benchmark example refer to <example/profileBenchmark.py>
+"""
+
+PROFILE_CFG = {
+    'throughput': {
+        'ciphers': ['aes128-ctr', 'aes256-ctr'],
+        'digests': ['hmac-sha2-256-etm@openssh.com', 'hmac-sha2-256', 'hmac-sha1'],
+        'compression': False,
+        'windowSize': 8 * 1024 * 1024,
+    },
+    'low-latency-handshake': {
+        'kex': ['curve25519-sha256@libssh.org', 'ecdh-sha2-nistp256', 
+                'ecdh-sha2-nistp384', 'ecdh-sha2-nistp521'],
+        'key_types': ['ssh-ed25519', 'ecdsa-sha2-nistp256', 'ecdsa-sha2-nistp384',
+                      'ecdsa-sha2-nistp521', 'rsa-sha2-256', 'rsa-sha2-512'],
+        'exclusive': ['kex', 'key_types'],
+        'compression': False,
+    },
+    'compressed-WAN': {
+        'ciphers': ['aes128-ctr'],
+        'digests': ['hmac-sha2-256-etm@openssh.com', 'hmac-sha2-256'],
+        'compression': True,
+    },
+}
+
+SEC_OPT_KEYS = ('ciphers', 'digests', 'kex', 'key_types')
+
+#-----------------------------------------------------------------------------
+def getProfile(profile):
+    """ Return the profile config dict.
+        Args:
+            profile (str or dict): profile name in PROFILE_CFG or a customized
+                profile dict with the same keys.
+        Returns:
+            dict: profile config, None if the profile name is not valid.
+    """
+    if isinstance(profile, dict): return profile
+    if profile not in PROFILE_CFG:
+        print("Error > getProfile(): profile %s is not in %s" % (str(profile), str(list(PROFILE_CFG.keys()))))
+        return None
+    return PROFILE_CFG[profile]
+
+#-----------------------------------------------------------------------------
+def applyProfile(transport, profile):
+    """ Apply the profile on a paramiko Transport (must be called before the
+        transport start_client()).
+        Args:
+            transport (paramiko.Transport): the transport object.
+            profile (str or dict): profile name or customized profile dict.
+        Returns:
+            bool: True if the profile is applied.
+    """
+    profileCfg = getProfile(profile)
+    if profileCfg is None: return False
+    secOpts = transport.get_security_options()
+    exclusive = profileCfg.get('exclusive', ())
+    secCfg = {}
+    for key in SEC_OPT_KEYS:
+        preferred = profileCfg.get(key)
+        if not preferred: continue
+        supported = list(getattr(secOpts, key))
+        # put the preferred algorithms in front and keep the others as fallback.
+        algorithms = [val for val in preferred if val in supported]
+        if key not in exclusive:
+            algorithms += [val for val in supported if val not in algorithms]
+        if not algorithms:
+            print("Error > applyProfile(): no supported algorithm of %s in the profile." % key)
+            return False
+        secCfg[key] = algorithms
+    for key, algorithms in secCfg.items():
+        setattr(secOpts, key, algorithms)
+    if 'compression' in profileCfg:
+        transport.use_compression(compress=bool(profileCfg['compression']))
+    if profileCfg.get('windowSize'):
+        transport.default_window_size = profileCfg['windowSize']
+    if profileCfg.get('maxPacketSize'):
+        transport.default_max_packet_size = profileCfg['maxPacketSize']
+    return True
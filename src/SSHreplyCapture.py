@@ -0,0 +1,209 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHreplyCapture.py
+#
+# Purpose:     This module is used to capture the ssh command output with a
+#              bounded memory usage. The output bigger than the config threshold
+#              will be spilled to a temporary file and the output bigger than
+#              the size cap will only keep the head and tail part.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/10
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    The sshConnector.runCmd() will decode the whole stdout into one string, a
+    runaway command (such as journalctl or cat a big log file) may use up all the
+    memory of the program. This module provides a capture policy which can be
+    set for each command, the output will be stored as below:
+
+    stdout ---> [ head part (memory) ---> spill to temp file ] ---> size cap
+                                                                      |
+                                                  [ tail ring buffer ] <---+
+
+    1. The first <maxBytes> bytes will be stored in memory, if the stored data
+       size is bigger than <spillBytes>, all the data will be moved to a temporary
+       file (optional memory-mapped when reading).
+    2. After <maxBytes> the data will be dropped, only the last <tailBytes> bytes
+       will be kept in a ring buffer.
+
+    The reply handler function will get a lazy file-backed cmdReply object
+    instead of a giant string.
+
+    Usage example:
+        policy = capturePolicy(maxBytes=64*1024*1024, tailBytes=64*1024, spillBytes=1024*1024)
+        connector.addCmd('journalctl', handleFun, capture=policy)
+"""
+
+import io
+import mmap
+import tempfile
+
+DEF_CHUNK_SZ = 32768    # default bytes read from the channel each time.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class capturePolicy(object):
+
+    def __init__(self, maxBytes=None, tailBytes=65536, spillBytes=1048576,
+                 useMmap=False, chunkSize=DEF_CHUNK_SZ) -> None:
+        """ Init the output capture policy. Example:
+                policy = capturePolicy(maxBytes=1024*1024, tailBytes=4096)
+            Args:
+                maxBytes (int, optional): max bytes (head part) stored for the
+                    command output, None means no size cap. Defaults to None.
+                tailBytes (int, optional): bytes of the output tail kept after the
+                    size cap is reached. Defaults to 65536.
+                spillBytes (int, optional): the stored data will be moved to a temp
+                    file when its size is bigger than this threshold, None means
+                    never spill. Defaults to 1048576 (1MB).
+                useMmap (bool, optional): flag to identify whether memory-map the
+                    temp file when read the reply. Defaults to False.
+                chunkSize (int, optional): bytes read from the channel each time.
+                    Defaults to DEF_CHUNK_SZ.
+        """
+        self.maxBytes = maxBytes
+        self.tailBytes = max(0, int(tailBytes)) if maxBytes is not None else 0
+        self.spillBytes = spillBytes
+        self.useMmap = useMmap
+        self.chunkSize = chunkSize
+
+    def createReply(self):
+        """ Create a new empty cmdReply object to capture one command's output."""
+        return cmdReply(self)
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class cmdReply(object):
+    """ Lazy (file-backed) command reply object, the data is stored in memory
+        or a temp file based on the capture policy. Use read()/iterChunks() to
+        read the raw bytes and getText() (or str()) to get the decoded string.
+    """
+    def __init__(self, policy) -> None:
+        self.policy = policy
+        self.size = 0           # total bytes received from the command.
+        self.droppedBytes = 0   # bytes dropped between the head and the tail.
+        self.spilled = False    # flag to identify whether the head is in a temp file.
+        self._head = io.BytesIO()
+        self._headSize = 0
+        self._tail = bytearray()
+        self._mmap = None
+        self._finished = False
+
+#-----------------------------------------------------------------------------
+    def write(self, data):
+        """ Append the received bytes data to the reply."""
+        if self._finished or not data: return
+        self.size += len(data)
+        maxBytes = self.policy.maxBytes
+        if maxBytes is not None and self._headSize + len(data) > maxBytes:
+            headPart = maxBytes - self._headSize
+            self._writeHead(data[:headPart])
+            self._writeTail(data[headPart:])
+        else:
+            self._writeHead(data)
+
+    def _writeHead(self, data):
+        if not data: return
+        self._head.write(data)
+        self._headSize += len(data)
+        spillBytes = self.policy.spillBytes
+        if not self.spilled and spillBytes is not None and self._headSize > spillBytes:
+            # move the data in memory to the temp file.
+            tmpFile = tempfile.TemporaryFile(prefix='sshReply_')
+            tmpFile.write(self._head.getvalue())
+            self._head = tmpFile
+            self.spilled = True
+
+    def _writeTail(self, data):
+        if not data: return
+        self._tail += data
+        overflow = len(self._tail) - self.policy.tailBytes
+        if overflow > 0:
+            del self._tail[:overflow]
+            self.droppedBytes += overflow
+
+#-----------------------------------------------------------------------------
+    def finish(self):
+        """ Finish the data capture, the reply is read-only after this call."""
+        if self._finished: return
+        self._finished = True
+        self._head.flush()
+        if self.spilled and self.policy.useMmap and self._headSize > 0:
+            self._mmap = mmap.mmap(self._head.fileno(), 0, access=mmap.ACCESS_READ)
+
+#-----------------------------------------------------------------------------
+    @property
+    def truncated(self):
+        """ True if part of the output was dropped by the size cap."""
+        return self.droppedBytes > 0
+
+    def __len__(self):
+        return self._headSize + len(self._tail)
+
+    def __str__(self):
+        return self.getText()
+
+    def __repr__(self):
+        return "<cmdReply size=%d stored=%d spilled=%s truncated=%s>" % (
+            self.size, len(self), self.spilled, self.truncated)
+
+#-----------------------------------------------------------------------------
+    def iterChunks(self, chunkSize=DEF_CHUNK_SZ, withTail=True):
+        """ Iterate the stored bytes chunk by chunk (head part then tail part)."""
+        if self._mmap is not None:
+            for pos in range(0, self._headSize, chunkSize):
+                yield self._mmap[pos:pos+chunkSize]
+        elif self.spilled:
+            self._head.seek(0)
+            while True:
+                data = self._head.read(chunkSize)
+                if not data: break
+                yield data
+            self._head.seek(0, io.SEEK_END)
+        elif self._headSize:
+            yield self._head.getvalue()
+        if withTail and self._tail:
+            yield bytes(self._tail)
+
+    def read(self):
+        """ Read all the stored bytes (head + tail)."""
+        return b''.join(self.iterChunks())
+
+    def getText(self, encoding='utf-8', errors='replace'):
+        """ Decode the stored data to string, a marker line will be inserted
+            between the head and tail if some output was dropped.
+            Args:
+                encoding (str, optional): Defaults to 'utf-8'.
+                errors (str, optional): decode error handling. Defaults to 'replace'.
+        """
+        headStr = b''.join(self.iterChunks(withTail=False)).decode(encoding, errors=errors)
+        if not self.truncated:
+            return headStr + bytes(self._tail).decode(encoding, errors=errors)
+        return "%s\n...[%d bytes dropped]...\n%s" % (
+            headStr, self.droppedBytes, bytes(self._tail).decode(encoding, errors=errors))
+
+#-----------------------------------------------------------------------------
+    def close(self):
+        """ Release the memory buffer and remove the temp file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._head.close()
+        self._tail = bytearray()
+
+#-----------------------------------------------------------------------------
+def captureStream(channelFile, policy):
+    """ Read all the data from a paramiko ChannelFile (stdout/stderr) with the
+        capture policy and return the cmdReply object.
+    """
+    reply = policy.createReply()
+    while True:
+        data = channelFile.read(policy.chunkSize)
+        if not data: break
+        reply.write(data)
+    reply.finish()
+    return reply
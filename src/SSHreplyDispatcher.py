@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHreplyDispatcher.py
+#
+# Purpose:     This module is used to dispatch the ssh command reply to the reply
+#              handler functions in a bounded worker thread pool, so the slow
+#              handler will not block the ssh command execution.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/12
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    The sshConnector.runCmd() will call the handleFun and replyHandler inline, a
+    slow handler (DB insert, parsing, HTTP post) will stall the next command and
+    the whole connector tree walk. The dispatcher moves the handler calls to the
+    worker threads:
+
+    runCmd(host1) --+--> queue[0] (bounded) ---> worker thread 0 ---> handlers
+                    |
+    runCmd(host2) --+--> queue[1] (bounded) ---> worker thread 1 ---> handlers
+
+    1. All the replies of one host (key) will be put in the same queue, so the
+       handler calling sequence of one host is same as the cmd sequence.
+    2. Each queue is bounded, the runCmd() will be blocked when the queue is full
+       (backpressure) so the memory will not be used up by the pending replies.
+    3. Call flush() to wait until all the pending replies are handled.
+
+    Usage example:
+        dispatcher = replyDispatcher(workerNum=4, queueSize=100)
+        mainHost.setReplyDispatcher(dispatcher)
+        mainHost.runCmd()
+        mainHost.flush()
+        dispatcher.stop()
+"""
+
+import zlib
+import queue
+import threading
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class replyDispatcher(object):
+
+    def __init__(self, workerNum=4, queueSize=100) -> None:
+        """ Init the dispatcher and start the worker threads. Example:
+                dispatcher = replyDispatcher(workerNum=4, queueSize=100)
+            Args:
+                workerNum (int, optional): number of the worker threads. Defaults to 4.
+                queueSize (int, optional): max pending replies of each worker, the
+                    submit() will be blocked when the queue is full. Defaults to 100.
+        """
+        self.workerNum = max(1, int(workerNum))
+        self.queueSize = queueSize
+        self.queues = [queue.Queue(maxsize=queueSize) for _ in range(self.workerNum)]
+        self.workers = []
+        self.running = True
+        for idx, taskQueue in enumerate(self.queues):
+            worker = threading.Thread(target=self._workLoop, args=(taskQueue,),
+                                      name='replyWorker-%d' % idx, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+#-----------------------------------------------------------------------------
+    def _workLoop(self, taskQueue):
+        """ Worker thread loop: get the reply from the queue and call the handlers."""
+        while True:
+            task = taskQueue.get()
+            try:
+                if task is None: break
+                handlers, rplDict, releaseFun = task
+                for handleFun in handlers:
+                    try:
+                        handleFun(rplDict)
+                    except Exception as err:
+                        print("Error > replyDispatcher: reply handler failed: %s" % str(err))
+                if releaseFun: releaseFun()
+            finally:
+                taskQueue.task_done()
+
+#-----------------------------------------------------------------------------
+    def submit(self, key, handlers, rplDict, releaseFun=None):
+        """ Put the reply in the worker queue (block if the queue is full).
+            Args:
+                key (str): ordering key (host), the replies with same key will be
+                    handled in the submit sequence.
+                handlers (list): list of the handle functions.
+                rplDict (dict): the reply dict passed to the handle functions.
+                releaseFun (function, optional): function called after all the
+                    handlers returned (such as close the cmdReply). Defaults to None.
+            Returns:
+                bool: True if the reply is submitted.
+        """
+        if not self.running:
+            print("Error > submit(): the reply dispatcher is stopped.")
+            return False
+        idx = zlib.crc32(str(key).encode()) % self.workerNum
+        self.queues[idx].put((handlers, rplDict, releaseFun))
+        return True
+
+#-----------------------------------------------------------------------------
+    def getPendingNum(self):
+        """ Return the number of the replies waiting in all the queues."""
+        return sum(taskQueue.qsize() for taskQueue in self.queues)
+
+#-----------------------------------------------------------------------------
+    def flush(self):
+        """ Wait until all the submitted replies are handled."""
+        for taskQueue in self.queues:
+            taskQueue.join()
+
+#-----------------------------------------------------------------------------
+    def stop(self):
+        """ Handle all the pending replies then stop the worker threads."""
+        if not self.running: return
+        self.running = False
+        for taskQueue in self.queues:
+            taskQueue.put(None)
+        for worker in self.workers:
+            worker.join()
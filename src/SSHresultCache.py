@@ -0,0 +1,143 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHresultCache.py
+#
+# Purpose:     This module provides a TTL + LRU result cache for the idempotent
+#              (read-only) remote commands, so the repeated probes on the same
+#              host return immediately without opening a new ssh channel.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/24
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    The automation program may run the read-only probes (uname -a, df, cat
+    /etc/os-release) on the same hosts again and again in a short time, each
+    run needs a new channel through the whole jumphost chain. The cache keeps
+    the reply string of the successful (exit status 0) cmd with the key (hop path,
+    cmd), the hop path is the (host, port, user) of each hop from the first
+    jumphost to the host, so the same private address behind different gateways
+    will not share the replies:
+
+    1. Each cmd can have its own time to live (addCmd(..., cacheTTL=sec)), the
+       cache's defaultTTL is used if the cmd has no TTL (None means not cached).
+    2. The least recently used entries will be removed when the entry number or
+       the total reply size is over the budget.
+    3. Use invalidate() to remove the entries of a host/user/cmd.
+    4. The cmds with 'sudo' or a capture policy are never cached.
+
+    Usage example:
+        cache = cmdResultCache(maxEntries=512, maxBytes=4*1024*1024)
+        mainHost.setResultCache(cache)
+        tgtHost.addCmd('uname -a', printRst, cacheTTL=60)
+        mainHost.runCmd()
+        print(cache.getJsonInfo())
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class cmdResultCache(object):
+
+    def __init__(self, maxEntries=1024, maxBytes=16777216, defaultTTL=None) -> None:
+        """ Init the cache obj. Example: cache = cmdResultCache(maxEntries=512)
+            Args:
+                maxEntries (int, optional): max cached replies. Defaults to 1024.
+                maxBytes (int, optional): max total size (utf-8 bytes) of the cached 
+                    replies. Defaults to 16777216 (16MB).
+                defaultTTL (float, optional): time to live (sec) of the cmds which
+                    have no TTL, None means only cache the cmds with TTL. Defaults
+                    to None.
+        """
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.defaultTTL = defaultTTL
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.totalBytes = 0
+        self._entries = OrderedDict()   # key -> (reply, expire time, size), LRU order.
+        self._lock = threading.Lock()
+
+#-----------------------------------------------------------------------------
+    @staticmethod
+    def makeKey(hopPath, cmdline):
+        """ Return the cache key of the cmd.
+            Args:
+                hopPath (list): (host, port, username) of each hop from the root
+                    to the host (sshConnector.getHopPath()).
+                cmdline (str): command line string.
+        """
+        return (tuple(hopPath), cmdline)
+
+#-----------------------------------------------------------------------------
+    def get(self, key):
+        """ Return the cached reply of the key, None if not cached or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+#-----------------------------------------------------------------------------
+    def put(self, key, reply, ttl):
+        """ Cache the reply string for ttl seconds.
+            Returns:
+                bool: True if the reply is cached.
+        """
+        if not ttl or ttl <= 0: return False
+        size = len(reply.encode())  # count the utf-8 bytes, not the characters.
+        if size > self.maxBytes: return False
+        with self._lock:
+            if key in self._entries: self._remove(key)
+            self._entries[key] = (reply, time.monotonic() + ttl, size)
+            self.totalBytes += size
+            # remove the least recently used entries which are over the budget.
+            while len(self._entries) > self.maxEntries or self.totalBytes > self.maxBytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.totalBytes -= entry[2]
+
+#-----------------------------------------------------------------------------
+    def invalidate(self, host=None, username=None, cmdline=None):
+        """ Remove the cached replies matching all the given fields, remove all
+            the replies if no field is given.
+            Returns:
+                int: number of the removed replies.
+        """
+        with self._lock:
+            # key[0][-1] is the (host, port, username) of the cmd's host.
+            keys = [key for key in self._entries
+                    if (host is None or key[0][-1][0] == host)
+                    and (username is None or key[0][-1][2] == username)
+                    and (cmdline is None or key[1] == cmdline)]
+            for key in keys: self._remove(key)
+        return len(keys)
+
+#-----------------------------------------------------------------------------
+    def getJsonInfo(self):
+        """ Get current object's info under Json format"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.totalBytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,273 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHtopology.py
+#
+# Purpose:     This module is used to load a declarative ssh topology json file
+#              and compile all the targets' jumphost chains into one sshConnector
+#              tree, the targets sharing the same jumphost prefix will share the
+#              same connectors so each distinct hop is only connected once.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/21
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    The scpConnector, localForwarder, loadTester and the test case all build the
+    jumphost chains by hand, if several targets share the jump hosts, each chain
+    will connect to these hops again. The topology loader merges the chains'
+    shared prefixes into a trie:
+
+    targets:                                    compiled connector tree:
+    web1: gateway -> jump2 -> web1              gateway ---> jump2 ---> web1
+    db1 : gateway -> jump2 -> db1       ==>        |            |
+    ipmi: gateway -> ipmi                          |            +---> db1
+                                                   +---> ipmi
+
+    Two hops are the same node if they have the same parent node and the same
+    (host, port, user). After initTunnel(), use getConnector(<target name>) to
+    get the target's connector for running cmds, scp (scpConnector) or port
+    forwarding (multiForwarder/remoteForwarder connector parameter).
+
+    Example of topology *.json file:
+    {
+        "hosts": {
+            "gateway": {"host": "gateway.ncl.sg", "port": 22, "user": "xxx",
+                        "password": "xxx", "profile": "low-latency-handshake"},
+            "jump2": {"host": "172.18.178.10", "user": "xxx", "password": "xxx"},
+            "web1": {"host": "172.18.178.11", "user": "xxx", "password": "xxx"},
+            "db1": {"host": "172.18.178.12", "user": "xxx", "password": "xxx"}
+        },
+        "targets": {
+            "web1": {"path": ["gateway", "jump2", "web1"], "cmdlist": ["uname -a"]},
+            "db1": ["gateway", "jump2", "db1"],
+            "gateway": ["gateway"]
+        }
+    }
+
+    Usage example:
+        topology = loadTopology('topology.json')
+        topology.initTunnel()
+        topology.getConnector('web1').addCmd('df -h', printRst)
+        topology.runCmd()
+        topology.close()
+"""
+
+import json
+from SSHconnector import sshConnector
+from SSHprofiles import getProfile
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class sshTopology(object):
+
+    def __init__(self, topoCfg=None) -> None:
+        """ Init the topology obj. Example: topology = sshTopology(json.load(f))
+            Args:
+                topoCfg (dict, optional): topology config dict with 'hosts' and
+                    'targets' (format refer to the module doc). Defaults to None.
+        """
+        self.hosts = {}         # host name -> host info dict.
+        self.targets = {}       # target name -> target info dict.
+        self.roots = []         # root connectors of the compiled tree.
+        self.nodes = {}         # hop key path (tuple) -> sshConnector.
+        self.nodeNames = {}     # hop key path (tuple) -> host name.
+        self.targetNodes = {}   # target name -> hop key path.
+        self.compiled = False
+        if topoCfg: self.loadDict(topoCfg)
+
+#-----------------------------------------------------------------------------
+    def loadDict(self, topoCfg):
+        """ Load the hosts and the targets from the topology config dict."""
+        for name, hostInfo in topoCfg.get('hosts', {}).items():
+            self.addHost(name, hostInfo['host'], hostInfo['user'], hostInfo['password'],
+                         port=hostInfo.get('port', 22), profile=hostInfo.get('profile'))
+        for name, targetInfo in topoCfg.get('targets', {}).items():
+            if isinstance(targetInfo, dict):
+                self.addTarget(name, targetInfo['path'], cmdlist=targetInfo.get('cmdlist'))
+            else:
+                self.addTarget(name, targetInfo)
+
+#-----------------------------------------------------------------------------
+    def addHost(self, name, host, username, password, port=22, profile=None):
+        """ Add a host (hop) which can be used in the targets' path.
+            Args:
+                name (str): unique host name used in the path.
+                host (str): host ip address or host domain name.
+                username (str): username.
+                password (str): user password.
+                port (int, optional): ssh port. Defaults to 22.
+                profile (str, optional): SSHprofiles profile name. Defaults to None.
+            Returns:
+                bool: True if the host is added.
+        """
+        if profile is not None and getProfile(profile) is None:
+            print("Error > addHost(): host %s profile is not valid." % str(name))
+            return False
+        self.hosts[name] = {'host': host, 'user': username, 'password': password,
+                            'port': int(port), 'profile': profile}
+        return True
+
+#-----------------------------------------------------------------------------
+    def addTarget(self, name, path, cmdlist=None):
+        """ Add a target with its jumphost path.
+            Args:
+                name (str): unique target name.
+                path (list): host names from the first jumphost to the target host.
+                cmdlist (list, optional): cmds to run on the target. Defaults to None.
+            Returns:
+                bool: True if the target is added.
+        """
+        if self.compiled:
+            print("Error > addTarget(): can not add target after the topology compiled.")
+            return False
+        if not path:
+            print("Error > addTarget(): target %s path is empty." % str(name))
+            return False
+        for hostName in path:
+            if hostName not in self.hosts:
+                print("Error > addTarget(): host %s of target %s is not defined." % (str(hostName), str(name)))
+                return False
+        self.targets[name] = {'path': list(path), 'cmdlist': cmdlist or []}
+        return True
+
+#-----------------------------------------------------------------------------
+    def _hopKey(self, hostName):
+        hostInfo = self.hosts[hostName]
+        return (hostInfo['host'], hostInfo['port'], hostInfo['user'])
+
+    def compile(self):
+        """ Compile all the targets' paths into the sshConnector tree (trie), the
+            shared prefix hops are only created once.
+            Returns:
+                list: root connectors.
+        """
+        if self.compiled: return self.roots
+        for targetName, targetInfo in self.targets.items():
+            keyPath, parent = (), None
+            for hostName in targetInfo['path']:
+                keyPath += (self._hopKey(hostName),)
+                connector = self.nodes.get(keyPath)
+                if connector is None:
+                    hostInfo = self.hosts[hostName]
+                    connector = sshConnector(parent, hostInfo['host'], hostInfo['user'],
+                                             hostInfo['password'], port=hostInfo['port'],
+                                             profile=hostInfo['profile'])
+                    if parent:
+                        parent.addChild(connector)
+                    else:
+                        self.roots.append(connector)
+                    self.nodes[keyPath] = connector
+                    self.nodeNames[keyPath] = hostName
+                parent = connector
+            self.targetNodes[targetName] = keyPath
+            for cmdline in targetInfo['cmdlist']:
+                parent.addCmd(cmdline)
+        self.compiled = True
+        return self.roots
+
+#-----------------------------------------------------------------------------
+    def getConnector(self, name):
+        """ Return the connector of a target name, or a host name if the host is
+            only one node in the tree. Return None if not found.
+        """
+        keyPath = self._getKeyPath(name)
+        return self.nodes[keyPath] if keyPath else None
+
+    def _getKeyPath(self, name):
+        if not self.compiled: self.compile()
+        if name in self.targetNodes: return self.targetNodes[name]
+        keyPaths = [keyPath for keyPath, hostName in self.nodeNames.items() if hostName == name]
+        if len(keyPaths) == 1: return keyPaths[0]
+        if len(keyPaths) > 1:
+            print("Warning > getConnector(): host %s has %d nodes, use target name." % (str(name), len(keyPaths)))
+        return None
+
+#-----------------------------------------------------------------------------
+    def initTunnel(self):
+        """ Compile the topology and init all the ssh tunnels, a failed hop only
+            fails its own subtree and the other branches still come up.
+            Returns:
+                bool: True if all the tunnels are connected.
+        """
+        result = True
+        for root in self.compile():
+            if not root.lock: result &= self._initNode(root)
+        return result
+
+    def _initNode(self, connector):
+        """ Init the connector's subtree, return False instead of raising if failed."""
+        try:
+            return connector.InitTunnel()
+        except Exception as err:
+            print("Error > initTunnel(): %s:%s subtree init failed: %s" 
+                  % (str(connector.host), str(connector.port), str(err)))
+            return False
+
+#-----------------------------------------------------------------------------
+    def getFailedTargets(self):
+        """ Return the names of the targets whose tunnel is not connected."""
+        return [targetName for targetName, keyPath in self.targetNodes.items()
+                if not self.nodes[keyPath].isActive()]
+
+#-----------------------------------------------------------------------------
+    def reconnect(self, name):
+        """ Re-init the first disconnected hop on the target's (or host's) path and
+            its subtree (all the hops behind a dead hop are dead too).
+            Returns:
+                bool: True if the target is connected.
+        """
+        keyPath = self._getKeyPath(name)
+        if keyPath is None: return False
+        for idx in range(1, len(keyPath) + 1):
+            connector = self.nodes[keyPath[:idx]]
+            if connector.isActive(): continue
+            print("Reconnect the ssh tunnel from %s:%s ..." % (str(connector.host), str(connector.port)))
+            connector.close()
+            self._initNode(connector)
+            break
+        return self.nodes[keyPath].isActive()
+
+#-----------------------------------------------------------------------------
+    def runCmd(self, interval=0.1):
+        """ Run the cmds queue of all the connectors in the tree, the hosts not
+            connected and their subtrees are skipped.
+        """
+        for root in self.roots:
+            try:
+                root.runCmd(interval=interval)
+            except Exception as err:
+                print("Error > runCmd(): %s:%s subtree run cmd failed: %s" 
+                      % (str(root.host), str(root.port), str(err)))
+
+#-----------------------------------------------------------------------------
+    def setAllreplyHandler(self, func):
+        """ Set the reply handler for all the connectors in the tree."""
+        if not self.compiled: self.compile()
+        for connector in self.nodes.values():
+            connector.setAllreplyHandler(func)
+
+#-----------------------------------------------------------------------------
+    def getJsonInfo(self):
+        """ Get current object's info under Json format"""
+        return {
+            'hosts num': len(self.hosts),
+            'targets': {name: info['path'] for name, info in self.targets.items()},
+            'compiled': self.compiled,
+            'connectors num': len(self.nodes),
+            'hops num (without dedup)': sum(len(info['path']) for info in self.targets.values())
+        }
+
+#-----------------------------------------------------------------------------
+    def close(self):
+        """ Close all the ssh sessions."""
+        for root in self.roots:
+            root.close()
+
+#-----------------------------------------------------------------------------
+def loadTopology(filePath):
+    """ Load the topology json file and return the sshTopology obj."""
+    with open(filePath, 'r') as f:
+        return sshTopology(json.load(f))
@@ -0,0 +1,204 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        SSHtracer.py
+#
+# Purpose:     This module is used to record the timing trace spans of each ssh
+#              tunnel setup phase (tcp connect, key exchange, authentication and
+#              channel open) and each command execution in the connector tree.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/14
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Program Design:
+    When the ssh tunnel chain init is slow, we need to know which hop and which
+    phase is the slow step. The tracer records the timed spans of every connector
+    node as a tree:
+
+    ssh.tunnel (jumphost1)
+        + tcp.connect
+        + ssh.kex
+        + ssh.auth
+    ssh.tunnel (jumphost2)
+        + ssh.channel_open (direct-tcpip through jumphost1)
+        + ssh.kex
+        + ssh.auth
+    ssh.cmd (jumphost2: 'ls')
+
+    The spans can be exported as a json list or as the OpenTelemetry (OTLP/JSON)
+    compatible records. If the connector has no tracer, a shared no-op span
+    (NULL_SPAN) is used so the trace function will nearly not cost any time.
+
+    Usage example:
+        tracer = sshTracer()
+        mainHost.setTracer(tracer)
+        mainHost.InitTunnel()
+        mainHost.runCmd()
+        tracer.exportJson('trace.json')
+"""
+
+import os
+import json
+import time
+import threading
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class nullSpan(object):
+    """ No-op span used when the tracing is disabled."""
+    spanId = None
+
+    def setAttr(self, key, value): pass
+
+    def setError(self, err): pass
+
+    def end(self): pass
+
+    def __enter__(self): return self
+
+    def __exit__(self, excType, excVal, excTb): return False
+
+NULL_SPAN = nullSpan()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class traceSpan(object):
+    """ One timed span, use it as a context manager or call end() to finish it."""
+    def __init__(self, tracer, name, parentId=None, attrs=None) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.spanId = os.urandom(8).hex()
+        self.parentId = parentId
+        self.attrs = dict(attrs) if attrs else {}
+        self.error = None
+        self.startNs = time.time_ns()
+        self.endNs = None
+
+    def setAttr(self, key, value):
+        self.attrs[key] = value
+
+    def setError(self, err):
+        self.error = str(err)
+
+    def end(self):
+        if self.endNs is not None: return
+        self.endNs = time.time_ns()
+        self.tracer.addSpan(self)
+
+    def __enter__(self): return self
+
+    def __exit__(self, excType, excVal, excTb):
+        if excVal is not None: self.setError(excVal)
+        self.end()
+        return False
+
+    def getDuration(self):
+        """ Return the span duration in milliseconds."""
+        if self.endNs is None: return None
+        return (self.endNs - self.startNs) / 1e6
+
+    def getJsonInfo(self):
+        """ Get current span's info under Json format"""
+        return {
+            'traceId': self.tracer.traceId,
+            'spanId': self.spanId,
+            'parentId': self.parentId,
+            'name': self.name,
+            'start': self.startNs,
+            'end': self.endNs,
+            'durationMs': self.getDuration(),
+            'attributes': self.attrs,
+            'error': self.error
+        }
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class sshTracer(object):
+
+    def __init__(self, serviceName='SSHconnector') -> None:
+        """ Init the tracer obj. Example: tracer = sshTracer()
+            Args:
+                serviceName (str, optional): service name in the OpenTelemetry
+                    resource. Defaults to 'SSHconnector'.
+        """
+        self.serviceName = serviceName
+        self.traceId = os.urandom(16).hex()
+        self.spans = []     # finished spans.
+        self._lock = threading.Lock()
+
+#-----------------------------------------------------------------------------
+    def startSpan(self, name, parent=None, **attrs):
+        """ Start a new span.
+            Args:
+                name (str): span name.
+                parent (traceSpan, optional): parent span. Defaults to None.
+                attrs: span attributes.
+            Returns:
+                traceSpan: the started span.
+        """
+        parentId = parent.spanId if parent is not None else None
+        return traceSpan(self, name, parentId=parentId, attrs=attrs)
+
+    def addSpan(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        """ Remove all the recorded spans."""
+        with self._lock:
+            self.spans = []
+
+#-----------------------------------------------------------------------------
+    def getJsonInfo(self):
+        """ Get all the recorded spans under Json format (list of dict)."""
+        with self._lock:
+            return [span.getJsonInfo() for span in self.spans]
+
+    def getOtelInfo(self):
+        """ Get all the recorded spans as OpenTelemetry OTLP/JSON resourceSpans."""
+        with self._lock:
+            spans = list(self.spans)
+        otelSpans = []
+        for span in spans:
+            otelSpan = {
+                'traceId': self.traceId,
+                'spanId': span.spanId,
+                'name': span.name,
+                'kind': 1,  # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(span.startNs),
+                'endTimeUnixNano': str(span.endNs),
+                'attributes': [{'key': key, 'value': _otelValue(val)} for key, val in span.attrs.items()],
+                'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+            }
+            if span.parentId: otelSpan['parentSpanId'] = span.parentId
+            otelSpans.append(otelSpan)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name',
+                                             'value': {'stringValue': self.serviceName}}]},
+                'scopeSpans': [{'scope': {'name': 'SSHtracer'}, 'spans': otelSpans}]
+            }]
+        }
+
+#-----------------------------------------------------------------------------
+    def exportJson(self, filePath, otel=False):
+        """ Save the recorded spans in a json file.
+            Args:
+                filePath (str): json file path.
+                otel (bool, optional): save as OpenTelemetry OTLP/JSON format.
+                    Defaults to False.
+        """
+        data = self.getOtelInfo() if otel else self.getJsonInfo()
+        with open(filePath, 'w') as f:
+            json.dump(data, f, indent=2)
+
+#-----------------------------------------------------------------------------
+def _otelValue(value):
+    """ Convert a python value to the OTLP AnyValue dict."""
+    if isinstance(value, bool): return {'boolValue': value}
+    if isinstance(value, int): return {'intValue': str(value)}
+    if isinstance(value, float): return {'doubleValue': value}
+    return {'stringValue': str(value)}
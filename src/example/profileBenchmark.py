@@ -0,0 +1,132 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        profileBenchmark.py
+#
+# Purpose:     This program is used to benchmark the ssh transport performance
+#              profiles (SSHprofiles.py) through a multi-hop ssh jumphost chain.
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/17
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+"""
+For each profile the program will build the whole jumphost chain, record the
+tunnel init time and the key exchange/auth time of each hop (by the SSHtracer),
+then run a cmd on the last host to generate <dataSize> bytes output and measure
+the throughput through the chain.
+
+Example of config *.json file:
+{
+    "profiles": ["default", "throughput", "low-latency-handshake", "compressed-WAN"],
+    "repeat": 3,
+    "dataSize": 104857600,
+    "chain": [
+        {
+            "host": "gateway.ncl.sg",
+            "port": 22,
+            "user": "xxx",
+            "password": "xxx"
+        },
+        {
+            "host": "xxx.xxx.xxx.xxx",
+            "port": 22,
+            "user": "xxx",
+            "password": "xxx"
+        }
+    ]
+}
+"""
+
+import os
+import sys
+import json
+import time
+
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+TOPDIR = 'src'
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+from SSHconnector import sshConnector
+from SSHtracer import sshTracer
+from SSHreplyCapture import capturePolicy
+
+# load all the config
+CFG_FILE = sys.argv[1] if len(sys.argv) > 1 else 'benchmarkConfig.json'
+DATA_CMD = 'head -c %d /dev/zero'
+# drop all the output, only count the bytes.
+COUNT_POLICY = capturePolicy(maxBytes=0, tailBytes=0)
+
+#-----------------------------------------------------------------------------
+def buildChain(chainCfg, profile):
+    """ Build the jumphost chain with the profile and return (head, tail) connectors."""
+    head = tail = None
+    for hopCfg in chainCfg:
+        connector = sshConnector(tail, hopCfg['host'], hopCfg['user'], hopCfg['password'],
+                                 port=hopCfg.get('port', 22), profile=profile)
+        if tail: tail.addChild(connector)
+        head = head or connector
+        tail = connector
+    return head, tail
+
+#-----------------------------------------------------------------------------
+def benchmarkProfile(chainCfg, profile, dataSize):
+    """ Run one benchmark round, return the result dict."""
+    head, tail = buildChain(chainCfg, None if profile == 'default' else profile)
+    tracer = sshTracer()
+    head.setTracer(tracer)
+    result = {'profile': profile, 'initMs': None, 'hops': [], 'mbps': None}
+    startT = time.perf_counter()
+    if not head.InitTunnel():
+        head.close()
+        return result
+    result['initMs'] = (time.perf_counter() - startT)*1000
+    # per hop key exchange and auth time.
+    spanInfo = tracer.getJsonInfo()
+    for tunnelSpan in [span for span in spanInfo if span['name'] == 'ssh.tunnel']:
+        hopRst = {'host': '%s:%s' % (tunnelSpan['attributes']['host'], tunnelSpan['attributes']['port']),
+                  'totalMs': tunnelSpan['durationMs']}
+        for span in spanInfo:
+            if span['parentId'] == tunnelSpan['spanId'] and span['name'] != 'ssh.tunnel':
+                hopRst[span['name']] = span['durationMs']
+                if span['name'] == 'ssh.kex': hopRst['cipher'] = span['attributes'].get('cipher')
+        result['hops'].append(hopRst)
+    # throughput through the whole chain.
+    replySize = []
+    tail.addCmd(DATA_CMD % dataSize, lambda rpl: replySize.append(rpl['reply'].size), capture=COUNT_POLICY)
+    startT = time.perf_counter()
+    head.runCmd(interval=0)
+    useTime = time.perf_counter() - startT
+    if replySize: result['mbps'] = replySize[0]*8/useTime/1e6
+    head.close()
+    return result
+
+#-----------------------------------------------------------------------------
+def main():
+    print("Start ssh transport profile benchmark.")
+    with open(CFG_FILE, 'r') as f:
+        configDict = json.load(f)
+    chainCfg = configDict['chain']
+    dataSize = int(configDict.get('dataSize', 100*1024*1024))
+    repeat = int(configDict.get('repeat', 3))
+    summary = []
+    for profile in configDict.get('profiles', ['default', 'throughput', 'low-latency-handshake', 'compressed-WAN']):
+        for i in range(repeat):
+            result = benchmarkProfile(chainCfg, profile, dataSize)
+            print("[%s] round %d: %s" % (profile, i, json.dumps(result)))
+            summary.append(result)
+    print("\nProfile                 | init(ms) avg | throughput(Mbps) avg")
+    for profile in dict.fromkeys(rst['profile'] for rst in summary):
+        initList = [rst['initMs'] for rst in summary if rst['profile'] == profile and rst['initMs']]
+        mbpsList = [rst['mbps'] for rst in summary if rst['profile'] == profile and rst['mbps']]
+        initAvg = sum(initList)/len(initList) if initList else float('nan')
+        mbpsAvg = sum(mbpsList)/len(mbpsList) if mbpsList else float('nan')
+        print("%-23s | %12.1f | %20.1f" % (profile, initAvg, mbpsAvg))
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        profilesTest.py
+#
+# Purpose:     Test case program of module SSHprofiles.py (no ssh host needed,
+#              the profiles are applied on a not started paramiko Transport).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/10
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import socket
+
+import paramiko
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHprofiles
+import SSHconnector
+
+def testCase(case):
+
+    def newTransport():
+        # the transport is never started, so a local socket pair is enough.
+        sock, peer = socket.socketpair()
+        peer.close()
+        return paramiko.Transport(sock), sock
+
+    print("Test Case 1: the preferred algorithms are put in front of the others.")
+    transport, sock = newTransport()
+    defCiphers = list(transport.get_security_options().ciphers)
+    assert SSHprofiles.applyProfile(transport, 'throughput')
+    secOpts = transport.get_security_options()
+    assert list(secOpts.ciphers[:2]) == ['aes128-ctr', 'aes256-ctr']
+    assert sorted(secOpts.ciphers) == sorted(defCiphers)
+    assert 'zlib@openssh.com' not in transport._preferred_compression
+    assert transport.default_window_size == 8 * 1024 * 1024
+    sock.close()
+    print(" - Pass")
+
+    print("Test Case 2: the exclusive option lists only keep the preferred ones.")
+    transport, sock = newTransport()
+    profileCfg = SSHprofiles.PROFILE_CFG['low-latency-handshake']
+    assert SSHprofiles.applyProfile(transport, 'low-latency-handshake')
+    secOpts = transport.get_security_options()
+    for key in profileCfg['exclusive']:
+        assert set(getattr(secOpts, key)) <= set(profileCfg[key])
+        assert len(getattr(secOpts, key)) > 0
+    sock.close()
+    print(" - Pass")
+
+    print("Test Case 3: compression profile turns on the transport compression.")
+    transport, sock = newTransport()
+    assert SSHprofiles.applyProfile(transport, 'compressed-WAN')
+    assert 'zlib@openssh.com' in transport._preferred_compression
+    sock.close()
+    print(" - Pass")
+
+    print("Test Case 4: invalid profile is rejected and the transport is not changed.")
+    transport, sock = newTransport()
+    secOpts = transport.get_security_options()
+    defKex, defCiphers = list(secOpts.kex), list(secOpts.ciphers)
+    assert not SSHprofiles.applyProfile(transport, 'no-such-profile')
+    # exclusive list without any supported algorithm fails before changing anything.
+    badProfile = {'ciphers': ['aes256-ctr'], 'kex': ['bogus-kex'], 'exclusive': ['kex']}
+    assert not SSHprofiles.applyProfile(transport, badProfile)
+    assert list(secOpts.kex) == defKex and list(secOpts.ciphers) == defCiphers
+    # not exclusive list falls back to the supported algorithms.
+    assert SSHprofiles.applyProfile(transport, {'kex': ['bogus-kex']})
+    assert list(secOpts.kex) == defKex
+    sock.close()
+    print(" - Pass")
+
+    print("Test Case 5: connector rejects the invalid profile name.")
+    try:
+        SSHconnector.sshConnector(None, 'host', 'user', 'password', profile='no-such-profile')
+        assert False, 'ValueError not raised'
+    except ValueError:
+        pass
+    connector = SSHconnector.sshConnector(None, 'host', 'user', 'password', profile='throughput')
+    assert not connector.setProfile('no-such-profile')
+    assert connector.profile == 'throughput'
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')
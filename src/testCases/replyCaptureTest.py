@@ -0,0 +1,90 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        replyCaptureTest.py
+#
+# Purpose:     Test case program of module SSHreplyCapture.py (no ssh host
+#              needed).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/10
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import io
+import os
+import sys
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHreplyCapture
+
+def testCase(case):
+
+    print("Test Case 1: small output is kept in memory without size cap.")
+    reply = SSHreplyCapture.capturePolicy().createReply()
+    reply.write(b'hello ')
+    reply.write(b'world')
+    reply.finish()
+    assert reply.read() == b'hello world'
+    assert str(reply) == 'hello world'
+    assert len(reply) == reply.size == 11
+    assert not reply.spilled and not reply.truncated
+    reply.write(b'ignored')     # read-only after finish()
+    assert reply.size == 11
+    reply.close()
+    print(" - Pass")
+
+    print("Test Case 2: output bigger than spillBytes is moved to a temp file.")
+    for useMmap in (False, True):
+        policy = SSHreplyCapture.capturePolicy(spillBytes=16, useMmap=useMmap)
+        reply = policy.createReply()
+        data = b''.join(b'line%03d\n' % i for i in range(100))
+        for pos in range(0, len(data), 7):
+            reply.write(data[pos:pos+7])
+        reply.finish()
+        assert reply.spilled and not reply.truncated
+        assert reply.read() == data
+        assert b''.join(reply.iterChunks(chunkSize=10)) == data
+        assert reply.getText() == data.decode()
+        reply.close()
+    print(" - Pass")
+
+    print("Test Case 3: output bigger than maxBytes keeps the head and the tail.")
+    policy = SSHreplyCapture.capturePolicy(maxBytes=10, tailBytes=5, spillBytes=None)
+    reply = policy.createReply()
+    data = bytes(range(48, 48+40))  # '0'..'W'
+    for pos in range(0, len(data), 3):
+        reply.write(data[pos:pos+3])
+    reply.finish()
+    assert reply.size == 40
+    assert reply.truncated and reply.droppedBytes == 25
+    assert len(reply) == 15
+    assert reply.read() == data[:10] + data[-5:]
+    assert reply.getText() == "%s\n...[25 bytes dropped]...\n%s" % (
+        data[:10].decode(), data[-5:].decode())
+    reply.close()
+    print(" - Pass")
+
+    print("Test Case 4: captureStream() reads the channel file chunk by chunk.")
+    data = ('résumé\n' * 1000).encode()
+    policy = SSHreplyCapture.capturePolicy(spillBytes=1024, chunkSize=100)
+    reply = SSHreplyCapture.captureStream(io.BytesIO(data), policy)
+    assert reply.spilled and reply.size == len(data)
+    assert reply.getText() == data.decode()
+    reply.close()
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')
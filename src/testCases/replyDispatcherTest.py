@@ -0,0 +1,77 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        replyDispatcherTest.py
+#
+# Purpose:     Test case program of module SSHreplyDispatcher.py (no ssh host
+#              needed).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/10
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import threading
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHreplyDispatcher
+
+def testCase(case):
+
+    print("Test Case 1: replies with the same key are handled in submit sequence.")
+    dispatcher = SSHreplyDispatcher.replyDispatcher(workerNum=4, queueSize=10)
+    results = {}
+    lock = threading.Lock()
+    def recordFun(rplDict):
+        time.sleep(0.001)
+        with lock:
+            results.setdefault(rplDict['host'], []).append(rplDict['idx'])
+    hosts = ['host%d' % i for i in range(6)]
+    for i in range(50):
+        for host in hosts:
+            assert dispatcher.submit(host, [recordFun], {'host': host, 'idx': i})
+    dispatcher.flush()
+    assert dispatcher.getPendingNum() == 0
+    for host in hosts:
+        assert results[host] == list(range(50))
+    print(" - Pass")
+
+    print("Test Case 2: all handlers are called, a failed handler does not stop the others.")
+    calls = []
+    released = threading.Event()
+    def badFun(rplDict): raise ValueError('bad handler')
+    def goodFun(rplDict): calls.append(rplDict['reply'])
+    dispatcher.submit('hostA', [badFun, goodFun], {'reply': 'ok'}, releaseFun=released.set)
+    dispatcher.flush()
+    assert calls == ['ok'] and released.is_set()
+    print(" - Pass")
+
+    print("Test Case 3: stop() handles the pending replies and rejects new ones.")
+    counter = []
+    for i in range(20):
+        dispatcher.submit('hostB', [lambda rplDict: counter.append(1)], {})
+    dispatcher.stop()
+    assert len(counter) == 20
+    assert not any(worker.is_alive() for worker in dispatcher.workers)
+    assert not dispatcher.submit('hostB', [goodFun], {'reply': 'late'})
+    assert calls == ['ok']
+    dispatcher.stop()   # stop twice is allowed.
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')
@@ -0,0 +1,130 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        resultCacheTest.py
+#
+# Purpose:     Test case program of module SSHresultCache.py (no ssh host
+#              needed, the connector's cmds are run by a local fake client).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/21
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import io
+import os
+import sys
+import time
+import subprocess
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHresultCache
+import SSHconnector
+
+#-----------------------------------------------------------------------------
+class fakeChannelFile(io.BytesIO):
+    """ stdout/stderr of the fake client with the cmd's exit status."""
+    def __init__(self, data, exitCode):
+        super().__init__(data)
+        self.channel = self
+        self.exitCode = exitCode
+
+    def recv_exit_status(self): return self.exitCode
+
+class fakeClient(object):
+    """ Fake paramiko.SSHClient which runs the cmd in the local shell."""
+    def __init__(self):
+        self.cmdlines = []
+
+    def exec_command(self, cmdline, get_pty=False):
+        self.cmdlines.append(cmdline)
+        proc = subprocess.run(cmdline, shell=True, capture_output=True)
+        return (None, fakeChannelFile(proc.stdout, proc.returncode),
+                fakeChannelFile(proc.stderr, proc.returncode))
+
+def testCase(case):
+
+    print("Test Case 1: cached reply expires after its TTL.")
+    cache = SSHresultCache.cmdResultCache(maxEntries=10, maxBytes=1024)
+    key = cache.makeKey([('10.0.0.1', 22, 'user')], 'uname -a')
+    assert not cache.put(key, 'Linux', 0)   # no TTL is not cached.
+    assert cache.put(key, 'Linux', 0.2)
+    assert cache.get(key) == 'Linux'
+    time.sleep(0.3)
+    assert cache.get(key) is None
+    assert cache.getJsonInfo() == {'entries': 0, 'bytes': 0, 'hits': 1, 'misses': 1, 'evictions': 0}
+    print(" - Pass")
+
+    print("Test Case 2: least recently used replies are removed over the budget.")
+    cache = SSHresultCache.cmdResultCache(maxEntries=3, maxBytes=1024)
+    hop = [('10.0.0.1', 22, 'user')]
+    for cmdline in ('cmd1', 'cmd2', 'cmd3'):
+        cache.put(cache.makeKey(hop, cmdline), cmdline, 60)
+    assert cache.get(cache.makeKey(hop, 'cmd1')) == 'cmd1'  # cmd2 is the LRU now.
+    cache.put(cache.makeKey(hop, 'cmd4'), 'cmd4', 60)
+    assert cache.get(cache.makeKey(hop, 'cmd2')) is None
+    assert cache.get(cache.makeKey(hop, 'cmd1')) == 'cmd1'
+    assert cache.getJsonInfo()['evictions'] == 1
+    # the byte budget counts the utf-8 bytes of the non-ASCII reply.
+    cache = SSHresultCache.cmdResultCache(maxEntries=10, maxBytes=12)
+    assert not cache.put(cache.makeKey(hop, 'big'), '中' * 5, 60) # 15 bytes.
+    assert cache.put(cache.makeKey(hop, 'cmd1'), '中' * 2, 60)    # 6 bytes.
+    assert cache.put(cache.makeKey(hop, 'cmd2'), '中' * 3, 60)    # 9 bytes.
+    assert cache.get(cache.makeKey(hop, 'cmd1')) is None
+    assert cache.getJsonInfo()['bytes'] == 9
+    print(" - Pass")
+
+    print("Test Case 3: same host behind different jumphosts has different keys.")
+    cache = SSHresultCache.cmdResultCache(maxEntries=10)
+    pathA = [('gatewayA', 22, 'user'), ('10.0.0.5', 22, 'root')]
+    pathB = [('gatewayB', 22, 'user'), ('10.0.0.5', 22, 'root')]
+    cache.put(cache.makeKey(pathA, 'hostname'), 'serverA', 60)
+    cache.put(cache.makeKey(pathB, 'hostname'), 'serverB', 60)
+    cache.put(cache.makeKey(pathB, 'uptime'), 'up 1 day', 60)
+    assert cache.get(cache.makeKey(pathA, 'hostname')) == 'serverA'
+    assert cache.get(cache.makeKey(pathB, 'hostname')) == 'serverB'
+    assert cache.invalidate(host='10.0.0.5', cmdline='hostname') == 2
+    assert cache.invalidate(host='gatewayA') == 0   # only match the cmd's host.
+    assert cache.invalidate(username='root') == 1
+    assert cache.getJsonInfo()['entries'] == 0
+    print(" - Pass")
+
+    print("Test Case 4: connector only caches the successful cmds' replies.")
+    cache = SSHresultCache.cmdResultCache(maxEntries=10, defaultTTL=60)
+    gatewayA = SSHconnector.sshConnector(None, 'gatewayA', 'user', 'xxx')
+    gatewayB = SSHconnector.sshConnector(None, 'gatewayB', 'user', 'xxx')
+    servers = []
+    for gateway in (gatewayA, gatewayB):
+        server = SSHconnector.sshConnector(gateway, '10.0.0.5', 'root', 'xxx')
+        gateway.addChild(server)
+        gateway.setResultCache(cache)
+        server.client, server.lock = fakeClient(), True
+        servers.append(server)
+    assert servers[0].resultCache is cache
+    rplDict = servers[0].execCmd('echo hello')
+    assert rplDict['reply'] == 'hello\n' and not rplDict['cached']
+    rplDict = servers[0].execCmd('echo hello')
+    assert rplDict['reply'] == 'hello\n' and rplDict['cached']
+    rplDict = servers[1].execCmd('echo hello')  # different hop path.
+    assert not rplDict['cached']
+    assert len(servers[0].client.cmdlines) == 1 and len(servers[1].client.cmdlines) == 1
+    for i in range(2):
+        rplDict = servers[0].execCmd('echo failed >&2; exit 1')
+        assert rplDict['reply'] == 'failed\n' and not rplDict['cached']
+    assert cache.getJsonInfo()['entries'] == 2
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')
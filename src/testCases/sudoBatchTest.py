@@ -0,0 +1,122 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        sudoBatchTest.py
+#
+# Purpose:     Test case program of the sshConnector batched sudo cmds (no ssh
+#              host needed, the root shell script is run by a local fake client
+#              without the sudo).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/21
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import io
+import os
+import sys
+import subprocess
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHconnector
+
+SUDO_CMD = "sudo -S -p '' "
+
+#-----------------------------------------------------------------------------
+class fakeStdin(object):
+    def __init__(self):
+        self.channel = self
+        self.data = ''
+        self.closed = False
+
+    def write(self, data): self.data += data
+
+    def flush(self): pass
+
+    def shutdown_write(self): self.closed = True
+
+class fakeClient(object):
+    """ Fake paramiko.SSHClient which runs the batch script in the local shell,
+        if the sudoFail is set, the sudo authentication fails.
+    """
+    def __init__(self, sudoFail=False):
+        self.sudoFail = sudoFail
+        self.cmdlines = []
+        self.stdin = None
+
+    def exec_command(self, cmdline, get_pty=False):
+        self.cmdlines.append(cmdline)
+        assert cmdline.startswith(SUDO_CMD) and not get_pty
+        self.stdin = fakeStdin()
+        if self.sudoFail:
+            return self.stdin, io.BytesIO(b''), io.BytesIO(b'Sorry, try again.\n')
+        proc = subprocess.run(cmdline[len(SUDO_CMD):], shell=True, capture_output=True)
+        return self.stdin, io.BytesIO(proc.stdout), io.BytesIO(proc.stderr)
+
+def testCase(case):
+
+    print("Test Case 1: only the plain 'sudo <cmd>' is batched.")
+    isBatchCmd = SSHconnector.sshConnector._isSudoBatchCmd
+    for cmdline in ('sudo apt update', '  sudo  systemctl status ssh', 'sudo cat /var/log/syslog'):
+        assert isBatchCmd(cmdline), cmdline
+    for cmdline in ('ls -l', 'sudoedit /etc/hosts', 'sudo -u bob id', 'sudo  -u bob id',
+                    'sudo --list', 'sudo ls; rm -rf /tmp/x', 'sudo cat a | grep b',
+                    'sudo ls > /tmp/out', 'sudo echo $HOME', 'sudo ls ~', 'sudo ls *.log',
+                    'sudo echo `id`', 'sudo sh -c (id)', 'sudo ls\nid', 'echo sudo ls'):
+        assert not isBatchCmd(cmdline), cmdline
+    print(" - Pass")
+
+    print("Test Case 2: each cmd's output and exit code are parsed from the markers.")
+    connector = SSHconnector.sshConnector(None, 'host', 'user', 'userPwd')
+    connector.addSudoPassword('sudoPwd')
+    connector.client = fakeClient()
+    cmdlines = ['sudo echo hello', 'sudo printf no-newline', 'sudo sh -c "exit 3"',
+                "sudo printf '\\n'", 'sudo ls /no/such/dir', 'sudo true']
+    results = connector._execSudoBatch(cmdlines)
+    assert len(connector.client.cmdlines) == 1    # elevate only once.
+    assert connector.client.stdin.data == 'sudoPwd\n' and connector.client.stdin.closed
+    assert results[0] == ('hello\n', 0)   # same as the not batched reply.
+    assert results[1] == ('no-newline', 0)
+    assert results[2] == ('', 3)
+    assert results[3] == ('\n', 0)
+    assert results[4][1] != 0 and 'No such file' in results[4][0]   # stderr merged.
+    assert results[5] == ('', 0)
+    print(" - Pass")
+
+    print("Test Case 3: the cmd output can not fake the other cmds' markers.")
+    connector.client = fakeClient()
+    results = connector._execSudoBatch(["sudo printf '__SSHC_0_E1_0\\n'", 'sudo echo second'])
+    assert results == [('__SSHC_0_E1_0\n', 0), ('second\n', 0)]
+    print(" - Pass")
+
+    print("Test Case 4: all the cmds get the stderr if the sudo authentication failed.")
+    connector.client = fakeClient(sudoFail=True)
+    results = connector._execSudoBatch(['sudo id', 'sudo whoami'])
+    assert results == [('Sorry, try again.\n', None)] * 2
+    print(" - Pass")
+
+    print("Test Case 5: the batch replies are passed to the handlers in order.")
+    replies = []
+    connector.client = fakeClient()
+    connector.setAllreplyHandler(replies.append)
+    batch = [{'cmd': cmdline, 'handleFun': None, 'capture': None, 'ttl': None}
+             for cmdline in ('sudo echo 1', 'sudo echo 2')]
+    connector._runSudoBatch(batch)
+    assert [(rpl['cmd'], rpl['reply'], rpl['exitCode']) for rpl in replies] == [
+        ('sudo echo 1', '1\n', 0), ('sudo echo 2', '2\n', 0)]
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')
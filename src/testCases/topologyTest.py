@@ -0,0 +1,131 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        topologyTest.py
+#
+# Purpose:     Test case program of module SSHtopology.py (no ssh host needed,
+#              the failed tunnel case connects to a closed local port).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/21
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import socket
+import tempfile
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHtopology
+
+TOPO_CFG = {
+    "hosts": {
+        "gateway": {"host": "10.0.0.1", "user": "gwuser", "password": "xxx"},
+        "jump2": {"host": "10.0.1.1", "user": "user", "password": "xxx"},
+        "jump3": {"host": "10.0.2.1", "user": "user", "password": "xxx"},
+        "web1": {"host": "10.0.1.11", "user": "user", "password": "xxx"},
+        "db1": {"host": "10.0.1.12", "user": "user", "password": "xxx", "profile": "throughput"},
+        "db1b": {"host": "10.0.1.12", "port": 2222, "user": "user", "password": "xxx"},
+        "web1b": {"host": "10.0.1.11", "user": "user", "password": "xxx"}
+    },
+    "targets": {
+        "web1": {"path": ["gateway", "jump2", "web1"], "cmdlist": ["uname -a", "df -h"]},
+        "db1": ["gateway", "jump2", "db1"],
+        "db1b": ["gateway", "jump2", "db1b"],
+        "web1-jump3": ["gateway", "jump3", "web1"],
+        "web1-alias": ["gateway", "jump2", "web1b"],
+        "gateway": ["gateway"]
+    }
+}
+
+def testCase(case):
+
+    print("Test Case 1: the shared prefix hops are only created once.")
+    topology = SSHtopology.sshTopology(TOPO_CFG)
+    roots = topology.compile()
+    assert topology.compile() is roots  # compile twice returns the same tree.
+    assert len(roots) == 1
+    gateway = roots[0]
+    assert gateway.host == '10.0.0.1' and gateway.parent is None
+    assert [child.host for child in gateway.childConnectors] == ['10.0.1.1', '10.0.2.1']
+    jump2 = gateway.childConnectors[0]
+    # same (host, port, user) behind the same parent is one node, a different
+    # port is a different node.
+    assert [(child.host, child.port) for child in jump2.childConnectors] == [
+        ('10.0.1.11', 22), ('10.0.1.12', 22), ('10.0.1.12', 2222)]
+    assert len(topology.nodes) == 7
+    info = topology.getJsonInfo()
+    assert info['connectors num'] == 7 and info['hops num (without dedup)'] == 16
+    print(" - Pass")
+
+    print("Test Case 2: get the targets' and hosts' connectors.")
+    web1 = topology.getConnector('web1')
+    assert web1.parent is jump2 and web1.profile is None
+    assert topology.getConnector('web1-alias') is web1
+    assert [cmdset['cmd'] for cmdset in web1.cmdlines] == ['uname -a', 'df -h']
+    assert topology.getConnector('db1').profile == 'throughput'
+    assert web1.getHopPath() == (('10.0.0.1', 22, 'gwuser'), ('10.0.1.1', 22, 'user'),
+                                 ('10.0.1.11', 22, 'user'))
+    web1Jump3 = topology.getConnector('web1-jump3')
+    assert web1Jump3 is not web1 and web1Jump3.parent.host == '10.0.2.1'
+    assert topology.getConnector('gateway') is gateway
+    assert topology.getConnector('jump2') is jump2      # host only in one node.
+    assert topology.getConnector('web1b') is None    # deduped to the web1 node.
+    assert topology.getConnector('unknown') is None
+    assert not topology.addTarget('late', ['gateway'])  # locked after compiled.
+    print(" - Pass")
+
+    print("Test Case 3: invalid hosts and targets are rejected.")
+    topology = SSHtopology.sshTopology()
+    assert not topology.addHost('bad', '10.0.0.1', 'user', 'xxx', profile='no-such-profile')
+    assert topology.addHost('gateway', '10.0.0.1', 'user', 'xxx')
+    assert not topology.addTarget('t1', [])
+    assert not topology.addTarget('t2', ['gateway', 'bad'])
+    assert topology.addTarget('t3', ['gateway'])
+    assert list(topology.targets.keys()) == ['t3']
+    print(" - Pass")
+
+    print("Test Case 4: load the topology file, a failed hop fails its subtree only.")
+    # get a local port without listener.
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    closedPort = sock.getsockname()[1]
+    sock.close()
+    topoCfg = {
+        "hosts": {
+            "gw1": {"host": "127.0.0.1", "port": closedPort, "user": "user", "password": "xxx"},
+            "gw2": {"host": "127.0.0.1", "port": closedPort, "user": "user2", "password": "xxx"},
+            "srv": {"host": "10.0.1.11", "user": "user", "password": "xxx"}
+        },
+        "targets": {"srv1": ["gw1", "srv"], "srv2": ["gw2", "srv"]}
+    }
+    with tempfile.TemporaryDirectory() as tmpDir:
+        filePath = os.path.join(tmpDir, 'topology.json')
+        with open(filePath, 'w') as f:
+            json.dump(topoCfg, f)
+        topology = SSHtopology.loadTopology(filePath)
+    assert len(topology.compile()) == 2     # different user is a different root.
+    assert not topology.initTunnel()
+    assert sorted(topology.getFailedTargets()) == ['srv1', 'srv2']
+    topology.getConnector('srv1').addCmd('uname -a')
+    topology.runCmd()   # the disconnected subtrees are skipped without exception.
+    assert not topology.reconnect('srv1')
+    topology.close()
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')
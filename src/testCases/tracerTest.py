@@ -0,0 +1,99 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        tracerTest.py
+#
+# Purpose:     Test case program of module SSHtracer.py (no ssh host needed).
+#
+# Author:      Yuancheng Liu
+#
+# Created:     2024/06/10
+# Version:     v_0.1.3
+# Copyright:   Copyright (c) 2024 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import tempfile
+
+print("Current working directory is : %s" % os.getcwd())
+DIR_PATH = dirpath = os.path.dirname(os.path.abspath(__file__))
+print("Current source code location : [%s]" % dirpath)
+
+TOPDIR = 'src'
+
+idx = dirpath.find(TOPDIR)
+gTopDir = dirpath[:idx + len(TOPDIR)] if idx != -1 else dirpath   # found it - truncate right after TOPDIR
+if os.path.exists(gTopDir): sys.path.insert(0, gTopDir)
+
+import SSHtracer
+import SSHconnector
+
+def testCase(case):
+
+    print("Test Case 1: record the parent and children spans.")
+    tracer = SSHtracer.sshTracer(serviceName='testService')
+    with tracer.startSpan('tunnel', host='gateway', port=22) as rootSpan:
+        childSpan = tracer.startSpan('cmd', parent=rootSpan, cmd='ls')
+        childSpan.setAttr('exitCode', 0)
+        childSpan.end()
+        childSpan.end()     # end twice only records the span once.
+    spans = tracer.getJsonInfo()
+    assert [span['name'] for span in spans] == ['cmd', 'tunnel']
+    assert spans[0]['parentId'] == rootSpan.spanId and spans[1]['parentId'] is None
+    assert spans[0]['attributes'] == {'cmd': 'ls', 'exitCode': 0}
+    assert spans[1]['attributes'] == {'host': 'gateway', 'port': 22}
+    assert all(span['traceId'] == tracer.traceId for span in spans)
+    assert all(span['durationMs'] >= 0 and span['error'] is None for span in spans)
+    print(" - Pass")
+
+    print("Test Case 2: the exception raised in the span is recorded as error.")
+    tracer.clear()
+    try:
+        with tracer.startSpan('connect') as span:
+            raise ConnectionError('connection refused')
+    except ConnectionError:
+        pass
+    spans = tracer.getJsonInfo()
+    assert len(spans) == 1 and spans[0]['error'] == 'connection refused'
+    print(" - Pass")
+
+    print("Test Case 3: export the spans in OpenTelemetry OTLP/JSON format.")
+    tracer.clear()
+    rootSpan = tracer.startSpan('tunnel', retry=False, rate=0.5)
+    tracer.startSpan('cmd', parent=rootSpan).end()
+    rootSpan.end()
+    with tempfile.TemporaryDirectory() as tmpDir:
+        filePath = os.path.join(tmpDir, 'trace.json')
+        tracer.exportJson(filePath, otel=True)
+        with open(filePath, 'r') as f:
+            otelInfo = json.load(f)
+    resource = otelInfo['resourceSpans'][0]
+    assert resource['resource']['attributes'][0]['value'] == {'stringValue': 'testService'}
+    childSpan, rootSpanInfo = resource['scopeSpans'][0]['spans']
+    assert childSpan['parentSpanId'] == rootSpanInfo['spanId']
+    assert 'parentSpanId' not in rootSpanInfo
+    assert rootSpanInfo['attributes'] == [
+        {'key': 'retry', 'value': {'boolValue': False}},
+        {'key': 'rate', 'value': {'doubleValue': 0.5}}]
+    assert rootSpanInfo['status'] == {'code': 1}
+    print(" - Pass")
+
+    print("Test Case 4: connector uses the no-op span when tracing is disabled.")
+    parent = SSHconnector.sshConnector(None, 'gateway', 'user', 'password')
+    child = SSHconnector.sshConnector(parent, 'server', 'user', 'password')
+    parent.addChild(child)
+    assert parent._startSpan('tunnel', None) is SSHtracer.NULL_SPAN
+    with SSHtracer.NULL_SPAN as span:
+        span.setAttr('host', 'gateway')
+    tracer.clear()
+    parent.setTracer(tracer)
+    assert child.tracer is tracer
+    child._startSpan('tunnel', None, host='server').end()
+    assert tracer.getJsonInfo()[0]['attributes'] == {'host': 'server'}
+    print(" - Pass")
+
+#-----------------------------------------------------------------------------
+if __name__ == '__main__':
+    testCase('all')